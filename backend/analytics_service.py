@@ -0,0 +1,254 @@
+import re
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Dict, Any, Optional, List
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Characters that cannot appear in MongoDB field names
+_FIELD_KEY_RE = re.compile(r'[.$]')
+
+
+# The first number in a display price, e.g. '2,500' in '₹2,500' or '500' in 'Rs. 500'
+_NUMBER_RE = re.compile(r'\d[\d,]*(?:\.\d+)?')
+# Unambiguous amounts: plain digits, or 1,234,567 / Indian 12,34,567 grouping, with up to 2 decimals
+_AMOUNT_RE = re.compile(r'^(?:\d+|\d{1,3}(?:,\d{3})+|\d{1,2}(?:,\d{2})+,\d{3})(?:\.\d{1,2})?$')
+
+
+def parse_price_minor_units(price: Any) -> Optional[int]:
+    """Parse a display price like '₹2,500' or '$19.99' into integer minor units.
+
+    Returns None when the format is ambiguous (e.g. '€12,50', '1.234,56' or a
+    range like '500-700') so the order is counted as unpriced rather than
+    recorded with a wrong amount.
+    """
+    if price is None or isinstance(price, bool):
+        return None
+    if isinstance(price, int):
+        return price * 100
+    try:
+        if isinstance(price, float):
+            amount = Decimal(str(price))
+        else:
+            text = str(price)
+            match = _NUMBER_RE.search(text)
+            if not match or not _AMOUNT_RE.match(match.group()):
+                return None
+            # Anything numeric after the amount ('1.234,56', '500-700') is ambiguous
+            rest = text[match.end():]
+            if any(ch.isdigit() for ch in rest):
+                return None
+            amount = Decimal(match.group().replace(',', ''))
+    except InvalidOperation:
+        return None
+    return int((amount * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def _field_key(value: Any) -> str:
+    """Make a value safe for use as a MongoDB field name"""
+    key = _FIELD_KEY_RE.sub('_', str(value or 'Uncategorized')).strip()
+    return key or 'Uncategorized'
+
+
+class AnalyticsService:
+    """Incrementally maintained sales rollups.
+
+    Every order bumps two kinds of aggregate documents with ``$inc`` upserts:
+
+    * ``sales_daily``: one document per UTC day (``_id`` is ``YYYY-MM-DD``)
+      holding order, unit and revenue counters plus per-category counters.
+    * ``sales_products``: one document per product with lifetime counters.
+
+    Reads only ever touch these small collections, never ``orders``.
+    """
+
+    def __init__(self):
+        self.daily_collection = 'sales_daily'
+        self.product_collection = 'sales_products'
+        self.rebuild_batch_size = 500
+
+    def order_metrics(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Derive numeric fields for an order so they can be stored alongside it"""
+        unit_price_minor = parse_price_minor_units(order_data.get('product_price'))
+        quantity = int(order_data.get('quantity') or 1)
+        return {
+            'product_price_minor': unit_price_minor,
+            'line_total_minor': unit_price_minor * quantity if unit_price_minor is not None else None,
+        }
+
+    def _rollup_updates(self, order_doc: Dict[str, Any]):
+        """Build the daily and product ``$inc`` upserts for one order document"""
+        created_at = order_doc.get('created_at') or datetime.utcnow()
+        day = created_at.strftime('%Y-%m-%d')
+        quantity = int(order_doc.get('quantity') or 1)
+        line_total = order_doc.get('line_total_minor')
+        if line_total is None:
+            line_total = self.order_metrics(order_doc)['line_total_minor']
+        revenue = line_total or 0
+        category = _field_key(order_doc.get('product_category'))
+
+        daily_inc = {
+            'orders': 1,
+            'units': quantity,
+            'revenue_minor': revenue,
+            f'categories.{category}.orders': 1,
+            f'categories.{category}.units': quantity,
+            f'categories.{category}.revenue_minor': revenue,
+        }
+        if line_total is None:
+            daily_inc['unpriced_orders'] = 1
+
+        daily = ({'_id': day}, {'$inc': daily_inc, '$set': {'date': day}})
+        product = (
+            {'_id': str(order_doc.get('product_id'))},
+            {
+                '$inc': {'orders': 1, 'units': quantity, 'revenue_minor': revenue},
+                '$set': {
+                    'product_name': order_doc.get('product_name', ''),
+                    'product_category': order_doc.get('product_category', ''),
+                },
+                '$max': {'last_order_at': created_at},
+            },
+        )
+        return daily, product
+
+    async def record_order(self, db, order_doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a single order to the rollups"""
+        try:
+            daily, product = self._rollup_updates(order_doc)
+            await db[self.daily_collection].update_one(*daily, upsert=True)
+            await db[self.product_collection].update_one(*product, upsert=True)
+            return {'success': True}
+        except Exception as e:
+            logger.error(f"Failed to update sales rollups: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    async def record_orders(self, db, order_docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply a batch of orders to the rollups with one bulk write per collection"""
+        try:
+            daily_ops: List[UpdateOne] = []
+            product_ops: List[UpdateOne] = []
+            for doc in order_docs:
+                daily, product = self._rollup_updates(doc)
+                daily_ops.append(UpdateOne(*daily, upsert=True))
+                product_ops.append(UpdateOne(*product, upsert=True))
+            if daily_ops:
+                await db[self.daily_collection].bulk_write(daily_ops, ordered=False)
+                await db[self.product_collection].bulk_write(product_ops, ordered=False)
+            return {'success': True}
+        except Exception as e:
+            logger.error(f"Failed to update sales rollups: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    async def ensure_indexes(self, db):
+        """Create the indexes used by the analytics queries"""
+        await db[self.product_collection].create_index([('units', -1)])
+
+    async def get_summary(self, db, days: int = 30, top: int = 10) -> Dict[str, Any]:
+        """Read daily revenue, units by category and top products from the rollups"""
+        since = (datetime.utcnow() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+        daily_docs = await db[self.daily_collection].find(
+            {'_id': {'$gte': since}}
+        ).sort('_id', 1).to_list(days)
+
+        daily = []
+        categories: Dict[str, Dict[str, int]] = {}
+        for doc in daily_docs:
+            daily.append({
+                'date': doc['_id'],
+                'orders': doc.get('orders', 0),
+                'units': doc.get('units', 0),
+                'revenue_minor': doc.get('revenue_minor', 0),
+            })
+            for name, counters in doc.get('categories', {}).items():
+                totals = categories.setdefault(name, {'orders': 0, 'units': 0, 'revenue_minor': 0})
+                for field in totals:
+                    totals[field] += counters.get(field, 0)
+
+        top_docs = await db[self.product_collection].find().sort('units', -1).limit(top).to_list(top)
+        top_products = [
+            {
+                'product_id': doc['_id'],
+                'product_name': doc.get('product_name', ''),
+                'product_category': doc.get('product_category', ''),
+                'orders': doc.get('orders', 0),
+                'units': doc.get('units', 0),
+                'revenue_minor': doc.get('revenue_minor', 0),
+            }
+            for doc in top_docs
+        ]
+
+        return {
+            'days': days,
+            'daily': daily,
+            'units_by_category': [
+                {'category': name, **totals}
+                for name, totals in sorted(categories.items(), key=lambda item: -item[1]['units'])
+            ],
+            'top_products': top_products,
+        }
+
+    async def _fold_orders(self, db, staging_daily: str, staging_product: str, last_id, batch_size: int):
+        """Add orders after ``last_id`` to the staging rollups; returns (count, new last_id)"""
+        processed = 0
+        projection = {
+            'created_at': 1, 'quantity': 1, 'product_id': 1, 'product_name': 1,
+            'product_category': 1, 'product_price': 1, 'line_total_minor': 1,
+        }
+        while True:
+            query = {'_id': {'$gt': last_id}} if last_id is not None else {}
+            batch = await db.orders.find(query, projection).sort('_id', 1).limit(batch_size).to_list(batch_size)
+            if not batch:
+                return processed, last_id
+
+            daily_ops: List[UpdateOne] = []
+            product_ops: List[UpdateOne] = []
+            for doc in batch:
+                daily, product = self._rollup_updates(doc)
+                daily_ops.append(UpdateOne(*daily, upsert=True))
+                product_ops.append(UpdateOne(*product, upsert=True))
+
+            await db[staging_daily].bulk_write(daily_ops, ordered=False)
+            await db[staging_product].bulk_write(product_ops, ordered=False)
+
+            processed += len(batch)
+            last_id = batch[-1]['_id']
+            logger.info(f"Rebuilt sales rollups for {processed} orders")
+
+    async def rebuild(self, db, batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """Recompute the rollups from ``orders`` history.
+
+        Orders are read in ``_id`` order in bounded batches, folded in memory per
+        batch and written with one ``bulk_write`` per collection into staging
+        collections, which then atomically replace the live ones.
+
+        Orders placed while the rebuild runs are picked up because the scan
+        continues until it finds nothing newer, but an order saved between that
+        final scan and the rename only updates the live rollups being replaced
+        and is lost from them. Run rebuilds while order traffic is paused.
+        """
+        batch_size = batch_size or self.rebuild_batch_size
+        staging_daily = f"{self.daily_collection}_rebuild"
+        staging_product = f"{self.product_collection}_rebuild"
+        await db[staging_daily].drop()
+        await db[staging_product].drop()
+
+        # Keeps reading until a scan finds nothing newer, so orders saved while
+        # earlier batches were written are included before the swap
+        processed, _ = await self._fold_orders(db, staging_daily, staging_product, None, batch_size)
+
+        if processed:
+            await db[staging_daily].rename(self.daily_collection, dropTarget=True)
+            await db[staging_product].rename(self.product_collection, dropTarget=True)
+        else:
+            await db[self.daily_collection].drop()
+            await db[self.product_collection].drop()
+        await self.ensure_indexes(db)
+
+        return {'success': True, 'orders_processed': processed}
+
+# Initialize the service
+analytics_service = AnalyticsService()
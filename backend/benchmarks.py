@@ -0,0 +1,184 @@
+"""Micro-benchmarks for the order API hot path.
+
+Compares FastAPI's default path (``jsonable_encoder`` + ``json.dumps`` and
+response-model construction, "before") with the orjson fast path used by the
+order endpoints ("after"), the legacy per-call Telegram escaping with the
+compiled notification templates, and ``OrderCreate`` validation with the
+v1-style ``@validator`` the model used to declare against the current
+``@field_validator``.
+
+    cd /app/backend
+    python benchmarks.py --number 20000 --output bench_results.json
+"""
+import json
+import timeit
+import uuid
+import argparse
+import warnings
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import validator
+from pydantic.warnings import PydanticDeprecatedSince20
+
+from json_response import dumps
+from notification_templates import TemplateRegistry
+from server import OrderCreate, OrderResponse, order_success_content, ORDER_SUCCESS_MESSAGE
+
+SAMPLE_ORDER = {
+    'customer_name': 'Priya Sharma',
+    'customer_email': 'priya.sharma@example.com',
+    'customer_phone': '+919876543210',
+    'customer_address': '12 MG Road, Bengaluru, Karnataka 560001',
+    'product_id': 2,
+    'product_name': 'Silk Saree',
+    'product_category': 'Sarees',
+    'product_price': '₹4,200',
+    'selected_color': 'Red',
+    'selected_size': 'Free Size',
+    'quantity': 2,
+    'notes': 'Please call before delivery',
+    'honeypot': '',
+}
+
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore', PydanticDeprecatedSince20)
+
+    class LegacyOrderCreate(OrderCreate):
+        """OrderCreate with the honeypot check declared as before the field_validator migration"""
+
+        @validator('honeypot')
+        def honeypot_must_be_empty(cls, v):
+            if v and v.strip():
+                raise ValueError('Spam detected')
+            return v
+
+
+def _sample_order_doc() -> Dict:
+    order_id = str(uuid.uuid4())
+    return {
+        '_id': ObjectId(),
+        'order_id': order_id,
+        'timestamp': '2026-10-19 10:00:00',
+        **SAMPLE_ORDER,
+        'sheets_result': {
+            'success': True,
+            'sheet_tab': 'Sheet1',
+            'updated_range': 'Sheet1!A120:M120',
+            'updated_rows': 1,
+            'row_data': list(map(str, SAMPLE_ORDER.values())),
+        },
+        'telegram_result': {'success': True, 'message': 'Notification sent successfully'},
+        'created_at': datetime.utcnow(),
+    }
+
+
+def _legacy_list_encode(orders: List[Dict]) -> bytes:
+    for order in orders:
+        order['_id'] = str(order['_id'])
+    return json.dumps(jsonable_encoder({'orders': orders})).encode('utf-8')
+
+
+_LEGACY_SPECIAL_CHARS = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
+
+
+def _legacy_escape(text: str) -> str:
+    for char in _LEGACY_SPECIAL_CHARS:
+        text = text.replace(char, f'\\{char}')
+    return text
+
+
+def _legacy_order_message(order_data: Dict) -> str:
+    """The per-call escaping and f-string layout the template engine replaced"""
+    fields = ['customer_name', 'customer_phone', 'customer_email', 'customer_address', 'product_name',
+              'product_category', 'product_price', 'selected_color', 'selected_size', 'quantity', 'notes',
+              'timestamp']
+    v = {field: _legacy_escape(str(order_data.get(field, 'N/A'))) for field in fields}
+    return f"""🛒 *NEW ORDER RECEIVED\\!*
+
+📋 *Order Details:*
+• *Customer:* {v['customer_name']}
+• *Phone:* {v['customer_phone']}
+• *Email:* {v['customer_email']}
+• *Address:* {v['customer_address']}
+
+🛍️ *Product Information:*
+• *Product:* {v['product_name']}
+• *Category:* {v['product_category']}
+• *Price:* {v['product_price']}
+• *Color:* {v['selected_color']}
+• *Size:* {v['selected_size']}
+• *Quantity:* {v['quantity']}
+
+📝 *Notes:* {v['notes']}
+
+⏰ *Timestamp:* {v['timestamp']}
+
+Please contact the customer to confirm the order\\."""
+
+
+def build_cases() -> Dict[str, Dict[str, Callable[[], object]]]:
+    raw_order = json.dumps(SAMPLE_ORDER).encode('utf-8')
+    order_id = str(uuid.uuid4())
+    orders = [_sample_order_doc() for _ in range(50)]
+    order_template = TemplateRegistry().get('order_full')
+    order_values = {**SAMPLE_ORDER, 'timestamp': '2026-10-19 10:00:00'}
+
+    return {
+        # Same path FastAPI takes for the request body: parse JSON, then validate
+        'validate_order': {
+            'before': lambda: LegacyOrderCreate.model_validate(json.loads(raw_order)),
+            'after': lambda: OrderCreate.model_validate(json.loads(raw_order)),
+        },
+        'serialize_order_response': {
+            'before': lambda: json.dumps(jsonable_encoder(OrderResponse(
+                id=order_id, status='success', message=ORDER_SUCCESS_MESSAGE, order_id=order_id
+            ))).encode('utf-8'),
+            'after': lambda: dumps(order_success_content(order_id)),
+        },
+        'serialize_order_list_50': {
+            'before': lambda: _legacy_list_encode([dict(order) for order in orders]),
+            'after': lambda: dumps({'orders': orders}),
+        },
+        'render_order_message': {
+            'before': lambda: _legacy_order_message(order_values),
+            'after': lambda: order_template.render(order_values),
+        },
+    }
+
+
+def run(number: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, variants in build_cases().items():
+        results[name] = {}
+        for label, func in variants.items():
+            seconds = min(timeit.repeat(func, number=number, repeat=3))
+            results[name][f'{label}_us'] = round(seconds / number * 1e6, 3)
+        if 'before_us' in results[name]:
+            results[name]['speedup'] = round(results[name]['before_us'] / results[name]['after_us'], 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=10000, help='Calls per measurement')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = run(args.number)
+    for name, row in results.items():
+        if 'before_us' in row:
+            print(f"{name:28} before {row['before_us']:>9.3f} us   after {row['after_us']:>9.3f} us   x{row['speedup']}")
+        else:
+            print(f"{name:28} {row['cost_us']:>9.3f} us")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'recorded_at': datetime.utcnow().isoformat(), 'number': args.number, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
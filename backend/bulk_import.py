@@ -0,0 +1,93 @@
+import csv
+import json
+import logging
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A parsed upload record: (line number, record dict or None, error message or None)
+ParsedRecord = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/json-lines')
+CSV_CONTENT_TYPES = ('text/csv', 'application/csv')
+
+# Longest single line accepted; keeps the line buffer bounded
+MAX_LINE_BYTES = 64 * 1024
+
+
+def detect_format(content_type: str, requested: Optional[str] = None) -> Optional[str]:
+    """Pick 'ndjson' or 'csv' from an explicit format or the request content type"""
+    if requested:
+        requested = requested.lower()
+        return requested if requested in ('ndjson', 'csv') else None
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    if media_type in NDJSON_CONTENT_TYPES:
+        return 'ndjson'
+    if media_type in CSV_CONTENT_TYPES:
+        return 'csv'
+    return None
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Yield (line number, text) for each line of a byte stream without buffering the whole body"""
+    buffer = b''
+    line_no = 0
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for raw in lines:
+            line_no += 1
+            if len(raw) > MAX_LINE_BYTES:
+                raise ValueError(f"Line {line_no} exceeds {MAX_LINE_BYTES} bytes")
+            yield line_no, raw.decode('utf-8-sig' if line_no == 1 else 'utf-8', errors='replace').rstrip('\r')
+        if len(buffer) > MAX_LINE_BYTES:
+            raise ValueError(f"Line {line_no + 1} exceeds {MAX_LINE_BYTES} bytes")
+    if buffer:
+        line_no += 1
+        yield line_no, buffer.decode('utf-8-sig' if line_no == 1 else 'utf-8', errors='replace').rstrip('\r')
+
+
+async def iter_ndjson_records(stream: AsyncIterator[bytes]) -> AsyncIterator[ParsedRecord]:
+    """Parse one JSON object per line, skipping blank lines"""
+    async for line_no, line in iter_lines(stream):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "Each line must be a JSON object"
+            continue
+        yield line_no, record, None
+
+
+async def iter_csv_records(stream: AsyncIterator[bytes]) -> AsyncIterator[ParsedRecord]:
+    """Parse CSV with a header row; quoted fields may span lines"""
+    header = None
+    pending = ''
+    start_line = 0
+    async for line_no, line in iter_lines(stream):
+        if not pending:
+            start_line = line_no
+            if not line.strip():
+                continue
+        pending = f"{pending}\n{line}" if pending else line
+        # An odd number of quotes means a quoted field continues on the next line
+        if pending.count('"') % 2:
+            continue
+
+        row = next(csv.reader([pending]), [])
+        pending = ''
+        if header is None:
+            header = [name.strip() for name in row]
+            continue
+        if len(row) > len(header):
+            yield start_line, None, f"Expected {len(header)} columns, got {len(row)}"
+            continue
+        record = {name: value for name, value in zip(header, row) if value != ''}
+        yield start_line, record, None
+
+    if pending:
+        yield start_line, None, "Unterminated quoted field"
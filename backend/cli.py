@@ -0,0 +1,98 @@
+import os
+import asyncio
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import typer
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+app = typer.Typer(help="ShopEasy maintenance commands")
+
+
+def get_db():
+    """Open a MongoDB connection using the same settings as the API server"""
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
+    client = AsyncIOMotorClient(mongo_url)
+    return client, client[os.environ.get('DB_NAME', 'shopeasy_db')]
+
+
+@app.command("rebuild-analytics")
+def rebuild_analytics(
+    batch_size: int = typer.Option(500, min=1, help="Orders read per batch"),
+):
+    """Recompute the sales rollups from order history"""
+    from analytics_service import analytics_service
+
+    async def run():
+        client, db = get_db()
+        try:
+            return await analytics_service.rebuild(db, batch_size=batch_size)
+        finally:
+            client.close()
+
+    result = asyncio.run(run())
+    typer.echo(f"Rebuilt sales rollups from {result['orders_processed']} orders")
+
+
+@app.command("replay-dead-letters")
+def replay_dead_letters(
+    kind: Optional[str] = typer.Option(None, help="Only replay 'sheets', 'telegram' or 'mongo' deliveries"),
+    since: Optional[datetime] = typer.Option(None, formats=["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"], help="Failed on or after (UTC)"),
+    until: Optional[datetime] = typer.Option(None, formats=["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"], help="Failed before (UTC)"),
+    error_class: Optional[str] = typer.Option(None, help="Only replay this error class, e.g. HttpError"),
+    include_failed: bool = typer.Option(False, help="Also retry letters that exhausted their attempts"),
+    batch_size: int = typer.Option(50, min=1, help="Dead letters read per batch"),
+    rate: float = typer.Option(1.0, min=0, help="Deliveries per second (0 = unthrottled)"),
+    limit: Optional[int] = typer.Option(None, min=1, help="Stop after this many dead letters"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only count what would be replayed"),
+):
+    """Retry failed Google Sheets / Telegram deliveries"""
+    from dead_letter_service import dead_letter_service, KIND_SHEETS, KIND_TELEGRAM, KIND_MONGO
+    from google_sheets_service import GoogleSheetsService
+    from telegram_service import TelegramService
+
+    if kind not in (None, KIND_SHEETS, KIND_TELEGRAM, KIND_MONGO):
+        raise typer.BadParameter("kind must be 'sheets', 'telegram' or 'mongo'")
+    query = dead_letter_service.build_query(kind, since, until, error_class, include_failed)
+
+    async def run():
+        client, db = get_db()
+        telegram_service = TelegramService()
+        await telegram_service.start()
+        try:
+            return await dead_letter_service.replay(
+                db, query, GoogleSheetsService(), telegram_service,
+                batch_size=batch_size, rate=rate, dry_run=dry_run, limit=limit
+            )
+        finally:
+            await telegram_service.close()
+            client.close()
+
+    summary = asyncio.run(run())
+    if dry_run:
+        typer.echo(f"{summary['matched']} dead letters would be replayed")
+    else:
+        typer.echo(f"Replayed {summary['replayed']} of {summary['matched']} dead letters, {summary['failed']} failed again")
+
+
+@app.command("fake-telegram")
+def fake_telegram(
+    host: str = typer.Option("127.0.0.1", help="Interface to listen on"),
+    port: int = typer.Option(8081, help="Port to listen on"),
+    faults: Optional[str] = typer.Option(None, help="e.g. latency_ms=80,jitter_ms=40,failure_rate=0.05,status=429"),
+):
+    """Run a local fake Telegram Bot API (set TELEGRAM_API_BASE=http://HOST:PORT)"""
+    import uvicorn
+    from fake_services import FaultProfile, create_fake_telegram_app
+
+    uvicorn.run(create_fake_telegram_app(FaultProfile.parse(faults)), host=host, port=port)
+
+
+if __name__ == "__main__":
+    app()
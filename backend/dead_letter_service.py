@@ -0,0 +1,213 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from analytics_service import analytics_service
+from order_status_service import DEFAULT_STATUS
+
+logger = logging.getLogger(__name__)
+
+KIND_SHEETS = 'sheets'
+KIND_TELEGRAM = 'telegram'
+# The order reached the sheet (and Telegram) but its MongoDB backup write failed
+KIND_MONGO = 'mongo'
+
+
+class DeadLetterService:
+    """Persists failed Sheets/Telegram deliveries so they can be replayed later.
+
+    Each document in ``dead_letters`` holds the full ``order_data`` plus the
+    delivery ``kind``, last ``error``/``error_class``, ``attempts`` and a
+    ``status`` of ``pending``, ``replayed`` or ``failed``.
+    """
+
+    def __init__(self):
+        self.collection = 'dead_letters'
+        self.max_attempts = 10
+
+    async def ensure_indexes(self, db):
+        await db[self.collection].create_index([('status', 1), ('created_at', 1)])
+
+    async def record(self, db, kind: str, order_data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a failed delivery; never raises so callers can keep their own error handling"""
+        try:
+            now = datetime.utcnow()
+            await db[self.collection].insert_one({
+                'kind': kind,
+                'order_id': order_data.get('order_id'),
+                'order_data': order_data,
+                'error': result.get('error', 'Unknown error'),
+                'error_class': result.get('error_class', 'Exception'),
+                # Telegram: only the chats that failed are retried
+                'chat_ids': result.get('failed_chats'),
+                'attempts': 1,
+                'status': 'pending',
+                'created_at': now,
+                'last_attempt_at': now
+            })
+            logger.info("Stored %s dead letter for order %s", kind, order_data.get('order_id'))
+            return {'success': True}
+        except Exception as e:
+            logger.error("Failed to store dead letter: %s", e)
+            return {'success': False, 'error': str(e)}
+
+    def build_query(
+        self,
+        kind: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        error_class: Optional[str] = None,
+        include_failed: bool = False
+    ) -> Dict[str, Any]:
+        query: Dict[str, Any] = {'status': {'$in': ['pending', 'failed']} if include_failed else 'pending'}
+        if kind:
+            query['kind'] = kind
+        if error_class:
+            query['error_class'] = error_class
+        if since or until:
+            query['created_at'] = {}
+            if since:
+                query['created_at']['$gte'] = since
+            if until:
+                query['created_at']['$lt'] = until
+        return query
+
+    async def _deliver(self, db, letter: Dict[str, Any], sheets_service, telegram_service) -> Dict[str, Any]:
+        """Re-run the failed step through the live services"""
+        order_data = letter['order_data']
+        if letter['kind'] == KIND_MONGO:
+            # order_data is the complete order document; only the write is retried
+            if await db.orders.find_one({'order_id': order_data.get('order_id')}, {'_id': 1}) is None:
+                await db.orders.insert_one({**order_data, 'replayed_from': letter['_id']})
+                await analytics_service.record_order(db, order_data)
+            return {'success': True}
+
+        if letter['kind'] == KIND_SHEETS:
+            # A previous replay already appended this order; never add a second row
+            if await db.orders.find_one({'order_id': order_data.get('order_id')}, {'_id': 1}) is not None:
+                logger.info("Order %s is already stored, skipping sheet append", order_data.get('order_id'))
+                return {'success': True}
+            sheets_result = await sheets_service.add_order_to_sheet(order_data)
+            if not sheets_result.get('success', False):
+                return sheets_result
+            await self._mark_replayed(db, letter)
+            await self._finish_sheets_replay(db, letter, sheets_result, telegram_service)
+            return sheets_result
+
+        telegram_result = await telegram_service.send_order_notification(order_data, letter.get('chat_ids'))
+        recipients = telegram_result.get('recipients', {})
+        if recipients:
+            await db.orders.update_one(
+                {'order_id': order_data.get('order_id')},
+                {'$set': {f'telegram_result.recipients.{chat_id}': result for chat_id, result in recipients.items()}}
+            )
+        if not telegram_result.get('success', False):
+            # Narrow the next replay to the chats that are still failing
+            await db[self.collection].update_one(
+                {'_id': letter['_id']},
+                {'$set': {'chat_ids': telegram_result.get('failed_chats')}}
+            )
+        return telegram_result
+
+    async def _mark_replayed(self, db, letter: Dict[str, Any]):
+        now = datetime.utcnow()
+        await db[self.collection].update_one(
+            {'_id': letter['_id']},
+            {'$set': {'status': 'replayed', 'replayed_at': now, 'last_attempt_at': now},
+             '$inc': {'attempts': 1}}
+        )
+        letter['status'] = 'replayed'
+
+    async def _finish_sheets_replay(self, db, letter: Dict[str, Any], sheets_result: Dict[str, Any], telegram_service):
+        """Run the steps the original request never reached; the row is already in the sheet,
+        so failures here become new dead letters instead of failing this one"""
+        order_data = letter['order_data']
+        telegram_result = await telegram_service.send_order_notification(order_data)
+        if not telegram_result.get('success', False):
+            await self.record(db, KIND_TELEGRAM, order_data, telegram_result)
+        order_doc = {
+            **order_data,
+            **analytics_service.order_metrics(order_data),
+            'sheet_tab': sheets_result.get('sheet_tab'),
+            'sheet_row': sheets_result.get('sheet_row'),
+            'status': DEFAULT_STATUS,
+            'sheets_result': sheets_result,
+            'telegram_result': telegram_result,
+            'replayed_from': letter['_id'],
+            'created_at': letter['created_at']
+        }
+        try:
+            await db.orders.insert_one(order_doc)
+        except Exception as e:
+            logger.error("Failed to store replayed order %s: %s", order_data.get('order_id'), e)
+            await self.record(db, KIND_MONGO, order_doc, {
+                'error': f"Failed to store order: {str(e)}",
+                'error_class': type(e).__name__
+            })
+            return
+        try:
+            await analytics_service.record_order(db, order_doc)
+        except Exception as e:
+            logger.error("Failed to update sales rollups for order %s: %s", order_data.get('order_id'), e)
+
+    async def replay(
+        self,
+        db,
+        query: Dict[str, Any],
+        sheets_service,
+        telegram_service,
+        batch_size: int = 50,
+        rate: float = 1.0,
+        dry_run: bool = False,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Replay matching dead letters in ``_id`` order, at most ``rate`` deliveries per second"""
+        summary = {'matched': 0, 'replayed': 0, 'failed': 0, 'dry_run': dry_run}
+        interval = 1.0 / rate if rate > 0 else 0.0
+        last_id = None
+
+        while limit is None or summary['matched'] < limit:
+            page_query = {**query, '_id': {'$gt': last_id}} if last_id is not None else query
+            size = batch_size if limit is None else min(batch_size, limit - summary['matched'])
+            batch = await db[self.collection].find(page_query).sort('_id', 1).limit(size).to_list(size)
+            if not batch:
+                break
+            last_id = batch[-1]['_id']
+            summary['matched'] += len(batch)
+            if dry_run:
+                continue
+
+            for letter in batch:
+                try:
+                    result = await self._deliver(db, letter, sheets_service, telegram_service)
+                except Exception as e:
+                    # One bad letter (e.g. a Mongo error) must not stop the whole run
+                    logger.error("Replay of dead letter %s failed: %s", letter['_id'], e)
+                    result = {'success': False, 'error': str(e), 'error_class': type(e).__name__}
+                now = datetime.utcnow()
+                if result.get('success', False):
+                    summary['replayed'] += 1
+                    if letter.get('status') != 'replayed':
+                        await self._mark_replayed(db, letter)
+                else:
+                    summary['failed'] += 1
+                    attempts = letter.get('attempts', 1) + 1
+                    await db[self.collection].update_one(
+                        {'_id': letter['_id']},
+                        {'$set': {
+                            'status': 'failed' if attempts >= self.max_attempts else 'pending',
+                            'error': result.get('error', 'Unknown error'),
+                            'error_class': result.get('error_class', 'Exception'),
+                            'last_attempt_at': now
+                        }, '$inc': {'attempts': 1}}
+                    )
+                if interval:
+                    await asyncio.sleep(interval)
+
+            logger.info("Dead letter replay progress: %s", summary)
+
+        return summary
+
+# Initialize the service
+dead_letter_service = DeadLetterService()
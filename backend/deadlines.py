@@ -0,0 +1,71 @@
+import time
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Absolute time.monotonic() deadline for the current request, if any
+deadline_var: ContextVar[Optional[float]] = ContextVar('deadline', default=None)
+
+# operation -> number of calls that ran out of budget
+deadline_exceeded_counts: Dict[str, int] = {}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call is attempted, or still running, after the request budget is spent"""
+
+    def __init__(self, operation: str):
+        super().__init__(f"Deadline exceeded during {operation}")
+        self.operation = operation
+
+
+def start_deadline(seconds: float):
+    """Give the current request (and every call it makes) ``seconds`` to finish"""
+    return deadline_var.set(time.monotonic() + seconds)
+
+
+def record_exceeded(operation: str):
+    deadline_exceeded_counts[operation] = deadline_exceeded_counts.get(operation, 0) + 1
+    logger.warning("Request deadline exceeded during %s", operation)
+
+
+def remaining(operation: str, cap: Optional[float] = None, minimum: Optional[float] = None) -> Optional[float]:
+    """Seconds left in the budget (capped at ``cap``); ``cap`` when no deadline is set.
+
+    Raises DeadlineExceeded if the budget is already gone, unless the call has a
+    reserved ``minimum``, in which case it always gets at least that long.
+    """
+    deadline = deadline_var.get()
+    if deadline is None:
+        return cap
+    left = deadline - time.monotonic()
+    if minimum is not None:
+        left = max(left, minimum)
+    elif left <= 0:
+        record_exceeded(operation)
+        raise DeadlineExceeded(operation)
+    return min(left, cap) if cap is not None else left
+
+
+async def within_deadline(awaitable: Awaitable[Any], operation: str, cap: Optional[float] = None,
+                          minimum: Optional[float] = None) -> Any:
+    """Await ``awaitable`` with only the time remaining; cancel it when the budget runs out.
+
+    ``minimum`` reserves time for calls that must not be skipped, such as the
+    backup write of an order that is already in the sheet.
+    """
+    try:
+        timeout = remaining(operation, cap, minimum)
+    except DeadlineExceeded:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        if minimum is None and deadline_var.get() is not None and deadline_var.get() <= time.monotonic():
+            record_exceeded(operation)
+            raise DeadlineExceeded(operation)
+        raise
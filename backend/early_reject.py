@@ -0,0 +1,129 @@
+import os
+import re
+import json
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BOT_USER_AGENTS = r'(?i)(scrapy|spider|crawler|headlesschrome|phantomjs|python-urllib|go-http-client|masscan|zgrab)'
+
+# Addresses of the reverse proxy in front of the API. A request that still
+# shows one of these was not resolved to its real client (no X-Forwarded-For
+# from a proxy uvicorn trusts), so it stands for every shopper at once.
+DEFAULT_PROXY_IPS = '127.0.0.1,::1'
+
+
+class OffenderCache:
+    """Bounded LRU of client IPs recently caught misbehaving, each with an expiry"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+
+    def add(self, client_ip: str):
+        self._entries[client_ip] = time.monotonic() + self.ttl
+        self._entries.move_to_end(client_ip)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __contains__(self, client_ip: str) -> bool:
+        expires_at = self._entries.get(client_ip)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._entries[client_ip]
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class EarlyRejectMiddleware:
+    """Pure ASGI middleware that turns away abusive POSTs before the body is read.
+
+    For the protected paths it checks, in order of cost: recent offenders,
+    the order rate limiter, Content-Length / Content-Type headers and the
+    User-Agent. Rejections reuse the API's ``{"detail", "status"}`` error
+    shape and are counted per reason in ``counters``. Clients that the app
+    answers with 429 are remembered in a bounded LRU so their next requests
+    cost a dict lookup. A bot fingerprint only rejects that request, and
+    requests from ``proxy_ips`` are never remembered.
+    """
+
+    def __init__(
+        self,
+        app,
+        protected_paths: Iterable[str] = ('/api/orders',),
+        is_rate_limited: Optional[Callable[[str], bool]] = None,
+        max_body_bytes: Optional[int] = None,
+        bot_user_agents: Optional[str] = None,
+        offenders: Optional[OffenderCache] = None,
+        counters: Optional[Dict[str, int]] = None,
+        proxy_ips: Optional[Iterable[str]] = None
+    ):
+        self.app = app
+        self.protected_paths = frozenset(protected_paths)
+        self.is_rate_limited = is_rate_limited
+        self.max_body_bytes = max_body_bytes or int(os.environ.get('MAX_ORDER_BODY_BYTES', '16384'))
+        self.bot_user_agents = re.compile(bot_user_agents or os.environ.get('BOT_USER_AGENT_PATTERN', DEFAULT_BOT_USER_AGENTS))
+        self.offenders = offenders or OffenderCache()
+        self.counters = counters if counters is not None else {}
+        if proxy_ips is None:
+            proxy_ips = os.environ.get('PROXY_IPS', DEFAULT_PROXY_IPS).split(',')
+        self.proxy_ips = frozenset(ip.strip() for ip in proxy_ips if ip.strip())
+
+    def _check(self, client_ip: str, headers: Dict[bytes, bytes]):
+        """Return (status, reason, detail) for a request to reject, or None"""
+        if client_ip not in self.proxy_ips and client_ip in self.offenders:
+            return 429, 'recent_offender', "Too many requests. Please wait before placing another order."
+        if self.is_rate_limited is not None and self.is_rate_limited(client_ip):
+            return 429, 'rate_limited', "Too many requests. Please wait before placing another order."
+
+        content_length = headers.get(b'content-length')
+        if content_length is None:
+            return 411, 'missing_length', "Content-Length header is required"
+        if not content_length.isdigit() or int(content_length) > self.max_body_bytes:
+            return 413, 'body_too_large', "Request body too large"
+
+        content_type = headers.get(b'content-type', b'').split(b';')[0].strip().lower()
+        if content_type != b'application/json':
+            return 415, 'bad_content_type', "Content-Type must be application/json"
+
+        user_agent = headers.get(b'user-agent', b'').decode('latin-1')
+        if not user_agent.strip() or self.bot_user_agents.search(user_agent):
+            # The User-Agent is trivially changed, so it never blocks the address itself
+            return 403, 'bot_user_agent', "Request rejected"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'POST' or scope['path'] not in self.protected_paths:
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = scope['client'][0] if scope.get('client') else 'unknown'
+        rejection = self._check(client_ip, dict(scope['headers']))
+        if rejection is not None:
+            status, reason, detail = rejection
+            self.counters[reason] = self.counters.get(reason, 0) + 1
+            body = json.dumps({"detail": detail, "status": "error"}).encode('utf-8')
+            await send({
+                'type': 'http.response.start',
+                'status': status,
+                'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+            })
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        async def send_wrapper(message):
+            # Remember clients the app itself rate-limited, if they have their own address
+            if (message['type'] == 'http.response.start' and message['status'] == 429
+                    and client_ip not in self.proxy_ips):
+                self.offenders.add(client_ip)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,404 @@
+"""Local stand-ins for Google Sheets and the Telegram Bot API.
+
+Selected by configuration (``GOOGLE_SHEETS_BACKEND``, ``TELEGRAM_API_BASE``)
+so the whole order pipeline can run, be profiled and be load-tested offline.
+Both accept a fault profile such as ``latency_ms=80,jitter_ms=40,failure_rate=0.05,status=503``.
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import itertools
+import logging
+import sqlite3
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from sheet_sharding import quote_tab
+from sheet_schema import column_letter
+
+logger = logging.getLogger(__name__)
+
+
+class FaultProfile:
+    """Injected latency and failures for a fake backend"""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, failure_rate: float = 0, status: int = 503):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.status = status
+
+    @classmethod
+    def parse(cls, setting: Optional[str]) -> 'FaultProfile':
+        """Parse ``key=value`` pairs, e.g. ``latency_ms=80,failure_rate=0.05``"""
+        options = {}
+        for item in (setting or '').split(','):
+            if '=' not in item:
+                continue
+            key, value = item.split('=', 1)
+            key = key.strip()
+            if key not in ('latency_ms', 'jitter_ms', 'failure_rate', 'status'):
+                logger.warning("Unknown fault profile option '%s' ignored", key)
+                continue
+            options[key] = int(value) if key == 'status' else float(value)
+        return cls(**options)
+
+    def delay(self) -> float:
+        """Seconds to wait before answering"""
+        return max(self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms), 0) / 1000
+
+    def should_fail(self) -> bool:
+        return self.failure_rate > 0 and random.random() < self.failure_rate
+
+
+# Google Sheets: A1 ranges, cell stores and the spreadsheets() resource
+
+_A1_RE = re.compile(r"^(?:'((?:[^']|'')+)'|([^!]+))!([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index
+
+
+def parse_a1(range_name: str, default_tab: str) -> Tuple[str, int, Optional[int], int, Optional[int]]:
+    """Split an A1 range into (tab, first_row, last_row, first_col, last_col).
+
+    Open ends (``A:A``, ``1:1``) are returned as None; columns are 1-based.
+    """
+    if '!' not in range_name:
+        range_name = f"{quote_tab(default_tab)}!{range_name}"
+    match = _A1_RE.match(range_name)
+    if not match:
+        raise _http_error(400, f"Unable to parse range: {range_name}")
+    quoted, bare, col1, row1, col2, row2 = match.groups()
+    tab = quoted.replace("''", "'") if quoted else bare
+    if match.group(5) is None and match.group(6) is None:
+        # Single cell or single column/row reference
+        col2, row2 = col1, row1
+    first_row = int(row1) if row1 else 1
+    last_row = int(row2) if row2 else None
+    first_col = _column_index(col1) if col1 else 1
+    last_col = _column_index(col2) if col2 else None
+    return tab, first_row, last_row, first_col, last_col
+
+
+def _http_error(status: int, message: str) -> HttpError:
+    content = json.dumps({'error': {'code': status, 'message': message}}).encode('utf-8')
+    return HttpError(httplib2.Response({'status': status}), content)
+
+
+class MemorySheetStore:
+    """Spreadsheet contents held in process memory: tab -> row number -> cells"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tabs: Dict[str, int] = {}
+        self._rows: Dict[str, Dict[int, List[str]]] = {}
+
+    def tabs(self) -> Dict[str, int]:
+        return dict(self._tabs)
+
+    def add_tab(self, title: str) -> int:
+        with self._lock:
+            if title in self._tabs:
+                raise _http_error(400, f"A sheet with the name \"{title}\" already exists")
+            sheet_id = len(self._tabs)
+            self._insert_tab(title, sheet_id)
+            return sheet_id
+
+    def _insert_tab(self, title: str, sheet_id: int):
+        self._tabs[title] = sheet_id
+        self._rows[title] = {}
+
+    def _read_row(self, tab: str, row: int) -> List[str]:
+        return self._rows[tab].get(row, [])
+
+    def _write_row(self, tab: str, row: int, cells: List[str]):
+        self._rows[tab][row] = cells
+
+    def last_row(self, tab: str) -> int:
+        return max(self._rows[tab], default=0)
+
+    def _check_tab(self, tab: str):
+        if tab not in self.tabs():
+            raise _http_error(400, f"Unable to parse range: {quote_tab(tab)}")
+
+    def read(self, tab: str, first_row: int, last_row: Optional[int], first_col: int,
+             last_col: Optional[int]) -> List[List[str]]:
+        """Cells of a rectangle with trailing empty cells and rows dropped, like the real API"""
+        with self._lock:
+            self._check_tab(tab)
+            last_row = last_row or self.last_row(tab)
+            values = []
+            for row in range(first_row, last_row + 1):
+                cells = self._read_row(tab, row)[first_col - 1:last_col]
+                while cells and cells[-1] == '':
+                    cells.pop()
+                values.append(cells)
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def write(self, tab: str, first_row: int, first_col: int, values: List[List[Any]]):
+        with self._lock:
+            self._check_tab(tab)
+            for offset, row_values in enumerate(values):
+                row = first_row + offset
+                cells = list(self._read_row(tab, row))
+                end = first_col - 1 + len(row_values)
+                cells.extend([''] * (end - len(cells)))
+                cells[first_col - 1:end] = ['' if value is None else str(value) for value in row_values]
+                self._write_row(tab, row, cells)
+
+    def append(self, tab: str, first_col: int, values: List[List[Any]]) -> int:
+        """Write rows after the last used row; returns the first row written"""
+        with self._lock:
+            self._check_tab(tab)
+            first_row = self.last_row(tab) + 1
+            self.write(tab, first_row, first_col, values)
+        return first_row
+
+
+class SQLiteSheetStore(MemorySheetStore):
+    """Spreadsheet contents persisted to a SQLite file, one JSON row per sheet row"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS tabs (title TEXT PRIMARY KEY, sheet_id INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS rows (
+                tab TEXT NOT NULL, row INTEGER NOT NULL, cells TEXT NOT NULL, PRIMARY KEY (tab, row)
+            );
+        """)
+        self._tabs = dict(self._db.execute("SELECT title, sheet_id FROM tabs"))
+
+    def _insert_tab(self, title: str, sheet_id: int):
+        with self._db:
+            self._db.execute("INSERT INTO tabs (title, sheet_id) VALUES (?, ?)", (title, sheet_id))
+        self._tabs[title] = sheet_id
+
+    def _read_row(self, tab: str, row: int) -> List[str]:
+        found = self._db.execute("SELECT cells FROM rows WHERE tab = ? AND row = ?", (tab, row)).fetchone()
+        return json.loads(found[0]) if found else []
+
+    def _write_row(self, tab: str, row: int, cells: List[str]):
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO rows (tab, row, cells) VALUES (?, ?, ?)",
+                (tab, row, json.dumps(cells, ensure_ascii=False))
+            )
+
+    def last_row(self, tab: str) -> int:
+        return self._db.execute("SELECT COALESCE(MAX(row), 0) FROM rows WHERE tab = ?", (tab,)).fetchone()[0]
+
+
+class FakeRequest:
+    """Deferred call with the ``execute()`` interface of googleapiclient requests"""
+
+    def __init__(self, faults: FaultProfile, operation, *args):
+        self.faults = faults
+        self.operation = operation
+        self.args = args
+
+    def execute(self, num_retries: int = 0) -> Dict[str, Any]:
+        time.sleep(self.faults.delay())
+        if self.faults.should_fail():
+            raise _http_error(self.faults.status, "Injected failure from fake Sheets backend")
+        return self.operation(*self.args)
+
+
+class FakeValues:
+    """``spreadsheets().values()`` subset: get, batchGet, update, append"""
+
+    def __init__(self, spreadsheet: 'FakeSpreadsheets'):
+        self.spreadsheet = spreadsheet
+        self.store = spreadsheet.store
+
+    def _request(self, operation, *args) -> FakeRequest:
+        return FakeRequest(self.spreadsheet.faults, operation, *args)
+
+    def _value_range(self, range_name: str) -> Dict[str, Any]:
+        tab, first_row, last_row, first_col, last_col = parse_a1(range_name, self.spreadsheet.default_tab)
+        value_range = {'range': range_name, 'majorDimension': 'ROWS'}
+        values = self.store.read(tab, first_row, last_row, first_col, last_col)
+        if values:
+            value_range['values'] = values
+        return value_range
+
+    def _updated_range(self, tab: str, first_row: int, first_col: int, values: List[List[Any]]) -> str:
+        width = max((len(row) for row in values), default=1)
+        last_row = first_row + max(len(values), 1) - 1
+        return (f"{quote_tab(tab)}!{column_letter(first_col)}{first_row}:"
+                f"{column_letter(first_col + width - 1)}{last_row}")
+
+    def get(self, spreadsheetId: str, range: str, **kwargs) -> FakeRequest:
+        return self._request(self._value_range, range)
+
+    def batchGet(self, spreadsheetId: str, ranges: List[str], **kwargs) -> FakeRequest:
+        def batch_get():
+            return {'spreadsheetId': spreadsheetId, 'valueRanges': [self._value_range(name) for name in ranges]}
+        return self._request(batch_get)
+
+    def update(self, spreadsheetId: str, range: str, body: Dict[str, Any], **kwargs) -> FakeRequest:
+        def update():
+            tab, first_row, _, first_col, _ = parse_a1(range, self.spreadsheet.default_tab)
+            values = body.get('values', [])
+            self.store.write(tab, first_row, first_col, values)
+            return {
+                'spreadsheetId': spreadsheetId,
+                'updatedRange': self._updated_range(tab, first_row, first_col, values),
+                'updatedRows': len(values),
+                'updatedCells': sum(len(row) for row in values)
+            }
+        return self._request(update)
+
+    def append(self, spreadsheetId: str, range: str, body: Dict[str, Any], **kwargs) -> FakeRequest:
+        def append():
+            tab, _, _, first_col, _ = parse_a1(range, self.spreadsheet.default_tab)
+            values = body.get('values', [])
+            first_row = self.store.append(tab, first_col, values)
+            return {
+                'spreadsheetId': spreadsheetId,
+                'tableRange': range,
+                'updates': {
+                    'spreadsheetId': spreadsheetId,
+                    'updatedRange': self._updated_range(tab, first_row, first_col, values),
+                    'updatedRows': len(values),
+                    'updatedCells': sum(len(row) for row in values)
+                }
+            }
+        return self._request(append)
+
+
+class FakeSpreadsheets:
+    """Drop-in for ``build('sheets', 'v4').spreadsheets()`` backed by a local store"""
+
+    def __init__(self, store: MemorySheetStore, default_tab: str, faults: Optional[FaultProfile] = None):
+        self.store = store
+        self.default_tab = default_tab
+        self.faults = faults or FaultProfile()
+        if default_tab not in store.tabs():
+            store.add_tab(default_tab)
+
+    def values(self) -> FakeValues:
+        return FakeValues(self)
+
+    def get(self, spreadsheetId: str, **kwargs) -> FakeRequest:
+        def get():
+            return {
+                'spreadsheetId': spreadsheetId,
+                'sheets': [
+                    {'properties': {'sheetId': sheet_id, 'title': title}}
+                    for title, sheet_id in self.store.tabs().items()
+                ]
+            }
+        return FakeRequest(self.faults, get)
+
+    def batchUpdate(self, spreadsheetId: str, body: Dict[str, Any], **kwargs) -> FakeRequest:
+        def batch_update():
+            replies = []
+            for request in body.get('requests', []):
+                if 'addSheet' not in request:
+                    raise _http_error(400, f"Unsupported request in fake backend: {sorted(request)}")
+                title = request['addSheet']['properties']['title']
+                sheet_id = self.store.add_tab(title)
+                replies.append({'addSheet': {'properties': {'sheetId': sheet_id, 'title': title}}})
+            return {'spreadsheetId': spreadsheetId, 'replies': replies}
+        return FakeRequest(self.faults, batch_update)
+
+
+def build_fake_spreadsheets(backend: str, default_tab: str, db_path: str = 'fake_sheets.db',
+                            faults: Optional[str] = None) -> FakeSpreadsheets:
+    """Create the ``memory`` or ``sqlite`` fake spreadsheet"""
+    if backend == 'memory':
+        store = MemorySheetStore()
+    elif backend == 'sqlite':
+        store = SQLiteSheetStore(db_path)
+    else:
+        raise ValueError(f"Unknown Google Sheets backend: {backend}")
+    logger.info("Using fake Google Sheets backend '%s'", backend)
+    return FakeSpreadsheets(store, default_tab, FaultProfile.parse(faults))
+
+
+# Telegram Bot API
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+def create_fake_telegram_app(faults: Optional[FaultProfile] = None, keep: int = 1000):
+    """A FastAPI app answering ``/bot<token>/sendMessage`` and ``/getMe`` like the Bot API.
+
+    Sent messages are kept in memory and listed at ``GET /messages``.
+    """
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+
+    faults = faults or FaultProfile()
+    messages: deque = deque(maxlen=keep)
+    message_ids = itertools.count(1)
+    app = FastAPI(title="Fake Telegram Bot API")
+
+    def error(status: int, description: str) -> JSONResponse:
+        content = {'ok': False, 'error_code': status, 'description': description}
+        if status == 429:
+            content['parameters'] = {'retry_after': 1}
+        return JSONResponse(content, status_code=status)
+
+    async def apply_faults() -> Optional[JSONResponse]:
+        await asyncio.sleep(faults.delay())
+        if faults.should_fail():
+            return error(faults.status, "Injected failure from fake Telegram backend")
+        return None
+
+    @app.api_route("/bot{token}/getMe", methods=["GET", "POST"])
+    async def get_me(token: str):
+        failure = await apply_faults()
+        if failure:
+            return failure
+        return {'ok': True, 'result': {
+            'id': 1, 'is_bot': True, 'first_name': 'Fake ShopEasy Bot', 'username': 'fake_shopeasy_bot'
+        }}
+
+    @app.post("/bot{token}/sendMessage")
+    async def send_message(token: str, request: Request):
+        failure = await apply_faults()
+        if failure:
+            return failure
+        payload = await request.json()
+        text = payload.get('text', '')
+        if not payload.get('chat_id'):
+            return error(400, "Bad Request: chat_id is empty")
+        if not text:
+            return error(400, "Bad Request: message text is empty")
+        if len(text) > TELEGRAM_MESSAGE_LIMIT:
+            return error(400, "Bad Request: message is too long")
+        message = {
+            'message_id': next(message_ids),
+            'date': int(time.time()),
+            'chat': {'id': payload['chat_id']},
+            'text': text,
+            'parse_mode': payload.get('parse_mode')
+        }
+        messages.append(message)
+        return {'ok': True, 'result': message}
+
+    @app.get("/messages")
+    async def list_messages(limit: int = 50):
+        return {'count': len(messages), 'messages': list(messages)[-limit:]}
+
+    @app.delete("/messages")
+    async def clear_messages():
+        messages.clear()
+        return {'ok': True}
+
+    return app
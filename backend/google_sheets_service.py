@@ -1,37 +1,100 @@
 import os
 import json
+import asyncio
 import logging
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from concurrent.futures import ThreadPoolExecutor
 from googleapiclient.errors import HttpError
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from deadlines import within_deadline
+from sheet_sharding import SheetShardingPolicy, a1_range, first_row
+from sheet_schema import SheetColumnSchema, CompiledHeader
 
 logger = logging.getLogger(__name__)
 
+class SheetsWriteOutcomeUnknown(Exception):
+    """A write was still running on the Sheets thread when its time ran out; it may yet land"""
+
 class GoogleSheetsService:
     def __init__(self):
         self.SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
         self.credentials_file = 'credentials.json'
         self.spreadsheet_id = os.getenv('GOOGLE_SHEET_ID', 'YOUR_SHEET_ID_PLACEHOLDER')
         self.sheet_name = os.getenv('GOOGLE_SHEET_NAME', 'Sheet1')
-        self.service = self._initialize_service()
+        self.sharding = SheetShardingPolicy.from_env(self.sheet_name)
+        self.schema = SheetColumnSchema.from_env()
+        # Cached map of tab title -> sheetId, loaded on first sharded append
+        self.tabs: Optional[Dict[str, int]] = None
+        self._tabs_lock = asyncio.Lock()
+        # Upper bound for a single Google API call; a request deadline can shorten it
+        self.timeout = float(os.getenv('GOOGLE_API_TIMEOUT', '10'))
+        # Time every write gets, even after the request budget is spent
+        self.write_min_seconds = float(os.getenv('GOOGLE_SHEETS_WRITE_MIN_SECONDS', str(self.timeout)))
+        # The API client is blocking and its HTTP object is not thread-safe, so calls
+        # run one at a time on a dedicated thread instead of on the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='google-sheets')
+        # The API client is built on first use (or by initialize() at startup)
+        self._service = None
+        self._initialized = False
+    
+    @property
+    def service(self):
+        if not self._initialized:
+            self._service = self._initialize_service()
+            self._initialized = True
+        return self._service
+    
+    async def initialize(self):
+        """Build the API client on the Sheets thread instead of at import time"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, lambda: self.service)
+    
+    async def warm_up(self) -> Dict[str, Any]:
+        """Fetch an access token and open the API connection before the first order"""
+        try:
+            if not self.service:
+                return {'success': False, 'error': 'Service not initialized'}
+            await self._execute(self.service.get(
+                spreadsheetId=self.spreadsheet_id,
+                fields='spreadsheetId'
+            ), 'warm_up')
+            return {'success': True}
+        except Exception as e:
+            logger.warning(f"Google Sheets warm-up failed: {str(e)}")
+            return {'success': False, 'error': str(e)}
     
     def _initialize_service(self):
-        """Initialize Google Sheets service with credentials"""
+        """Initialize Google Sheets service with credentials, or a local fake if configured"""
+        backend = os.getenv('GOOGLE_SHEETS_BACKEND', 'google')
+        if backend != 'google':
+            from fake_services import build_fake_spreadsheets
+            return build_fake_spreadsheets(
+                backend,
+                self.sheet_name,
+                db_path=os.getenv('GOOGLE_SHEETS_FAKE_DB', 'fake_sheets.db'),
+                faults=os.getenv('GOOGLE_SHEETS_FAULTS')
+            )
+        
         try:
             # Check if credentials file exists
             if not os.path.exists(self.credentials_file):
                 logger.warning(f"Credentials file {self.credentials_file} not found. Using placeholder.")
                 return None
             
+            # The Google client libraries are slow to import; load them only when needed
+            import httplib2
+            from google.oauth2 import service_account
+            from google_auth_httplib2 import AuthorizedHttp
+            from googleapiclient.discovery import build
+            
             # Load credentials from service account file
             credentials = service_account.Credentials.from_service_account_file(
                 self.credentials_file, 
                 scopes=self.SCOPES
             )
             
-            # Build the service
-            service = build('sheets', 'v4', credentials=credentials)
+            # Build the service with an explicit socket timeout
+            http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=self.timeout))
+            service = build('sheets', 'v4', http=http)
             logger.info("Google Sheets service initialized successfully")
             return service.spreadsheets()
             
@@ -52,6 +115,117 @@ class GoogleSheetsService:
             logger.error(f"Failed to get service account email: {str(e)}")
             return 'SERVICE_ACCOUNT_EMAIL_PLACEHOLDER'
     
+    async def _execute(self, request, operation: str, write: bool = False) -> Dict[str, Any]:
+        """Run a Google API request off the event loop with only the time left in the request budget.
+        
+        A call already running on the Sheets thread cannot be cancelled, so writes
+        get at least ``write_min_seconds`` to report their real outcome. If even that
+        runs out, SheetsWriteOutcomeUnknown is raised instead of a plain failure.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, request.execute)
+        if not write:
+            return await within_deadline(future, f"sheets.{operation}", cap=self.timeout)
+        try:
+            return await within_deadline(
+                asyncio.shield(future),
+                f"sheets.{operation}",
+                cap=self.timeout,
+                minimum=self.write_min_seconds
+            )
+        except asyncio.TimeoutError:
+            future.add_done_callback(lambda done: self._log_late_write(operation, done))
+            raise SheetsWriteOutcomeUnknown(
+                f"Google Sheets {operation} did not finish within {self.write_min_seconds:g}s"
+            )
+    
+    def _log_late_write(self, operation: str, future: asyncio.Future):
+        """Report how a write that outlived its request finally ended"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error("Late Google Sheets %s failed: %s", operation, error)
+        else:
+            logger.warning("Late Google Sheets %s completed: %s", operation,
+                           future.result().get('updates', {}).get('updatedRange', ''))
+    
+    async def _load_tabs(self) -> Dict[str, int]:
+        """Read the spreadsheet's tab titles once and seed the sharding state"""
+        metadata = await self._execute(self.service.get(
+            spreadsheetId=self.spreadsheet_id,
+            fields='sheets.properties(sheetId,title)'
+        ), 'get_tabs')
+        tabs = {
+            sheet['properties']['title']: sheet['properties']['sheetId']
+            for sheet in metadata.get('sheets', [])
+        }
+        if self.sharding.mode == 'rows':
+            self.sharding.current_rows = await self._count_rows(self.sharding.resume_tab(tabs))
+        return tabs
+    
+    async def _count_rows(self, sheet_name: str) -> int:
+        """Count the used rows of a tab (only called once when row sharding starts)"""
+        try:
+            result = await self._execute(self.service.values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=a1_range(sheet_name, 'A:A')
+            ), 'count_rows')
+            return len(result.get('values', []))
+        except HttpError:
+            return 0
+    
+    async def _ensure_tab(self, sheet_name: str):
+        """Create a shard tab with the header row if it does not exist yet"""
+        if sheet_name in self.tabs:
+            return
+        async with self._tabs_lock:
+            if sheet_name in self.tabs:
+                return
+            
+            try:
+                result = await self._execute(self.service.batchUpdate(
+                    spreadsheetId=self.spreadsheet_id,
+                    body={'requests': [{'addSheet': {'properties': {'title': sheet_name}}}]}
+                ), 'add_tab', write=True)
+            except HttpError as error:
+                # Another process (or the owner) created it since the tab map was loaded
+                if error.resp.status != 400 or 'already exists' not in str(error):
+                    raise
+                self.tabs = await self._load_tabs()
+                if sheet_name not in self.tabs:
+                    raise
+                logger.info(f"Sheet tab '{sheet_name}' already exists, reloaded the tab map")
+            else:
+                self.tabs[sheet_name] = result['replies'][0]['addSheet']['properties']['sheetId']
+                logger.info(f"Created sheet tab '{sheet_name}'")
+            
+            # Only writes the header if the tab is still empty
+            await self.create_header_row(sheet_name)
+    
+    async def resolve_tab(self, order_data: Dict[str, Any]) -> str:
+        """Route an order to its shard tab, creating the tab when needed"""
+        if self.sharding.mode == 'none':
+            return self.sheet_name
+        if self.tabs is None:
+            async with self._tabs_lock:
+                if self.tabs is None:
+                    self.tabs = await self._load_tabs()
+        sheet_name = self.sharding.route(order_data)
+        await self._ensure_tab(sheet_name)
+        return sheet_name
+    
+    async def _header_map(self, sheet_name: str) -> CompiledHeader:
+        """Return the compiled header map, re-reading only the header row when the check is due"""
+        if not self.schema.needs_check(sheet_name):
+            return self.schema.compiled[sheet_name]
+        result = await self._execute(self.service.values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=a1_range(sheet_name, '1:1')
+        ), 'get_header')
+        values = result.get('values', [])
+        return self.schema.apply_header(sheet_name, values[0] if values else [])
+    
     async def add_order_to_sheet(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
         """Add a new order row to Google Sheets"""
         try:
@@ -59,24 +233,12 @@ class GoogleSheetsService:
                 raise Exception("Google Sheets service not initialized. Please check credentials.json file.")
             
             # Prepare the row data
-            row_data = [
-                order_data.get('timestamp', ''),
-                order_data.get('customer_name', ''),
-                order_data.get('customer_email', ''),
-                order_data.get('customer_phone', ''),
-                order_data.get('customer_address', ''),
-                order_data.get('product_name', ''),
-                order_data.get('product_category', ''),
-                order_data.get('product_price', ''),
-                order_data.get('selected_color', ''),
-                order_data.get('selected_size', ''),
-                str(order_data.get('quantity', 1)),
-                order_data.get('notes', ''),
-                'New Order'  # Status column
-            ]
+            sheet_name = await self.resolve_tab(order_data)
+            header_map = await self._header_map(sheet_name)
+            row_data = header_map.build_row(order_data)
             
             # Define the range to append data
-            range_name = f"{self.sheet_name}!A:M"
+            range_name = a1_range(sheet_name, f"A:{header_map.last_column}")
             
             # Prepare the request body
             body = {
@@ -84,89 +246,207 @@ class GoogleSheetsService:
             }
             
             # Execute the request
-            result = self.service.values().append(
+            result = await self._execute(self.service.values().append(
                 spreadsheetId=self.spreadsheet_id,
                 range=range_name,
                 valueInputOption='USER_ENTERED',
                 body=body
-            ).execute()
+            ), 'append', write=True)
             
             # Get updated range info
             updated_range = result.get('updates', {}).get('updatedRange', '')
             updated_rows = result.get('updates', {}).get('updatedRows', 0)
             
-            logger.info(f"Successfully added order to sheet. Updated range: {updated_range}")
+            logger.info("Successfully added order to sheet. Updated range: %s", updated_range)
             
             return {
                 'success': True,
+                'sheet_tab': sheet_name,
+                'sheet_row': first_row(updated_range),
+                'schema_version': header_map.version,
                 'updated_range': updated_range,
                 'updated_rows': updated_rows,
                 'row_data': row_data
             }
             
+        except SheetsWriteOutcomeUnknown as error:
+            logger.error("Order %s may or may not be in the sheet: %s", order_data.get('order_id'), error)
+            return {
+                'success': False,
+                'outcome_unknown': True,
+                'sheet_tab': sheet_name,
+                'row_data': row_data,
+                'error': str(error),
+                'error_class': type(error).__name__
+            }
         except HttpError as error:
-            logger.error(f"Google Sheets API error: {error}")
+            logger.error("Google Sheets API error: %s", error)
             return {
                 'success': False,
-                'error': f"Google Sheets API error: {str(error)}"
+                'error': f"Google Sheets API error: {str(error)}",
+                'error_class': type(error).__name__
             }
         except Exception as error:
-            logger.error(f"Failed to add order to sheet: {error}")
+            logger.error("Failed to add order to sheet: %s", error)
             return {
                 'success': False,
-                'error': f"Failed to add order to sheet: {str(error)}"
+                'error': f"Failed to add order to sheet: {str(error)}",
+                'error_class': type(error).__name__
             }
     
-    async def create_header_row(self):
+    async def add_orders_to_sheet(self, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Append many order rows to Google Sheets with one request per shard tab.
+        
+        Tabs are appended independently, so the result lists the orders that were
+        ``written``, that ``failed`` and, for a timed-out append, whose outcome is
+        ``unverified``; ``success`` is true only when every row was written.
+        """
+        try:
+            if not self.service:
+                raise Exception("Google Sheets service not initialized. Please check credentials.json file.")
+            
+            # Group rows by shard tab so each tab gets one append
+            orders_by_tab: Dict[str, List[Dict[str, Any]]] = {}
+            for order_data in orders:
+                sheet_name = await self.resolve_tab(order_data)
+                order_data['sheet_tab'] = sheet_name
+                orders_by_tab.setdefault(sheet_name, []).append(order_data)
+        except Exception as error:
+            logger.error(f"Failed to add orders to sheet: {error}")
+            return {
+                'success': False,
+                'error': f"Failed to add orders to sheet: {str(error)}",
+                'written': [],
+                'unverified': [],
+                'failed': orders
+            }
+        
+        written: List[Dict[str, Any]] = []
+        unverified: List[Dict[str, Any]] = []
+        failed: List[Dict[str, Any]] = []
+        errors = []
+        updated_ranges = []
+        updated_rows = 0
+        for sheet_name, tab_orders in orders_by_tab.items():
+            try:
+                header_map = await self._header_map(sheet_name)
+                rows = [header_map.build_row(order_data) for order_data in tab_orders]
+                result = await self._execute(self.service.values().append(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=a1_range(sheet_name, f"A:{header_map.last_column}"),
+                    valueInputOption='USER_ENTERED',
+                    body={'values': rows}
+                ), 'append_batch', write=True)
+            except SheetsWriteOutcomeUnknown as error:
+                logger.error(f"{len(tab_orders)} orders may or may not be in sheet '{sheet_name}': {error}")
+                unverified.extend(tab_orders)
+                errors.append(f"{sheet_name}: {str(error)}")
+                continue
+            except Exception as error:
+                logger.error(f"Failed to add {len(tab_orders)} orders to sheet '{sheet_name}': {error}")
+                failed.extend(tab_orders)
+                errors.append(f"{sheet_name}: {str(error)}")
+                continue
+            
+            updated_range = result.get('updates', {}).get('updatedRange', '')
+            updated_ranges.append(updated_range)
+            updated_rows += result.get('updates', {}).get('updatedRows', 0)
+            written.extend(tab_orders)
+            
+            # Rows are appended contiguously, so each order's row follows from the first
+            start_row = first_row(updated_range)
+            if start_row is not None:
+                for offset, order_data in enumerate(tab_orders):
+                    order_data['sheet_row'] = start_row + offset
+        
+        logger.info(f"Added {len(written)} of {len(orders)} orders to sheet. Updated ranges: {updated_ranges}")
+        
+        result = {
+            'success': not failed and not unverified,
+            'updated_ranges': updated_ranges,
+            'updated_rows': updated_rows,
+            'written': written,
+            'unverified': unverified,
+            'failed': failed
+        }
+        if errors:
+            result['error'] = '; '.join(errors)
+        return result
+    
+    async def get_field_values(self, field: str, locations: List[Tuple[str, int]]) -> Dict[str, Any]:
+        """Read one field's cell for many (tab, row) locations with a single batchGet"""
+        try:
+            if not self.service:
+                raise Exception("Google Sheets service not initialized. Please check credentials.json file.")
+            if not locations:
+                return {'success': True, 'values': []}
+            
+            # Tabs can order their columns differently, so find the field's column per tab
+            columns: Dict[str, Optional[str]] = {}
+            for sheet_name, _ in locations:
+                if sheet_name not in columns:
+                    columns[sheet_name] = (await self._header_map(sheet_name)).column_for(field)
+                    if columns[sheet_name] is None:
+                        logger.warning("Sheet '%s' has no column for '%s'", sheet_name, field)
+            readable = [(sheet_name, row) for sheet_name, row in locations if columns[sheet_name]]
+            
+            found = {}
+            if readable:
+                result = await self._execute(self.service.values().batchGet(
+                    spreadsheetId=self.spreadsheet_id,
+                    ranges=[a1_range(sheet_name, f"{columns[sheet_name]}{row}") for sheet_name, row in readable]
+                ), 'batch_get')
+                for location, value_range in zip(readable, result.get('valueRanges', [])):
+                    rows = value_range.get('values') or [[]]
+                    found[location] = rows[0][0] if rows[0] else ''
+            
+            # One value per location, in order; '' where the tab has no such column
+            values = [found.get(location, '') for location in locations]
+            return {'success': True, 'values': values}
+            
+        except Exception as error:
+            logger.error("Failed to read %s values from sheet: %s", field, error)
+            return {
+                'success': False,
+                'error': f"Failed to read sheet values: {str(error)}",
+                'error_class': type(error).__name__
+            }
+    
+    async def create_header_row(self, sheet_name: Optional[str] = None):
         """Create header row if sheet is empty"""
         try:
             if not self.service:
                 return {'success': False, 'error': 'Service not initialized'}
             
-            # Check if sheet has data
-            range_name = f"{self.sheet_name}!A1:M1"
-            result = self.service.values().get(
+            # Check if sheet has a header row
+            sheet_name = sheet_name or self.sheet_name
+            result = await self._execute(self.service.values().get(
                 spreadsheetId=self.spreadsheet_id,
-                range=range_name
-            ).execute()
+                range=a1_range(sheet_name, '1:1')
+            ), 'get_header')
             
             values = result.get('values', [])
             
-            # If no header row, create one
+            # If no header row, create one from the column schema
             if not values:
-                headers = [
-                    'Timestamp',
-                    'Customer Name',
-                    'Customer Email',
-                    'Customer Phone',
-                    'Customer Address',
-                    'Product Name',
-                    'Product Category',
-                    'Product Price',
-                    'Selected Color',
-                    'Selected Size',
-                    'Quantity',
-                    'Notes',
-                    'Status'
-                ]
+                headers = self.schema.default_header
+                header_map = self.schema.apply_header(sheet_name, headers)
                 
                 body = {'values': [headers]}
                 
-                self.service.values().update(
+                await self._execute(self.service.values().update(
                     spreadsheetId=self.spreadsheet_id,
-                    range=f"{self.sheet_name}!A1:M1",
+                    range=a1_range(sheet_name, f"A1:{header_map.last_column}1"),
                     valueInputOption='USER_ENTERED',
                     body=body
-                ).execute()
+                ), 'write_header', write=True)
                 
                 logger.info("Header row created successfully")
-                return {'success': True, 'message': 'Header row created'}
+                return {'success': True, 'message': 'Header row created', 'schema_version': header_map.version}
             
-            return {'success': True, 'message': 'Header row already exists'}
+            header_map = self.schema.apply_header(sheet_name, values[0])
+            return {'success': True, 'message': 'Header row already exists', 'schema_version': header_map.version}
             
         except Exception as e:
             logger.error(f"Failed to create header row: {str(e)}")
             return {'success': False, 'error': str(e)}
-
-# Initialize the service
-sheets_service = GoogleSheetsService()
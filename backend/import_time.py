@@ -0,0 +1,80 @@
+"""Import-time report for the API server.
+
+Runs ``python -X importtime -c "import server"`` in a fresh interpreter, parses
+the per-module timings and prints the slowest top-level imports. With
+``--budget-ms`` it exits non-zero when the total exceeds the cold-start budget,
+so it can gate CI or a deploy.
+
+    cd /app/backend
+    python import_time.py --top 20 --budget-ms 1500 --output import_time.json
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from typing import Dict, List
+
+# "import time:       self [us] |  cumulative | imported package"
+_LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Parse ``-X importtime`` output into entries with self/cumulative microseconds and depth"""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({
+                'module': module,
+                'self_us': int(self_us),
+                'cumulative_us': int(cumulative_us),
+                # Nested imports are indented two spaces per level below the first
+                'depth': (len(indent) - 1) // 2,
+            })
+    return entries
+
+
+def measure(module: str) -> List[Dict]:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr[-2000:])
+        raise SystemExit(f"Importing {module} failed")
+    return parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='server', help='Module to import')
+    parser.add_argument('--top', type=int, default=15, help='Slowest top-level imports to list')
+    parser.add_argument('--budget-ms', type=float, help='Fail if the total import time exceeds this')
+    parser.add_argument('--output', help='Write all entries as JSON to this file')
+    args = parser.parse_args()
+
+    entries = measure(args.module)
+    top_level = [entry for entry in entries if entry['depth'] == 0]
+    total_ms = sum(entry['cumulative_us'] for entry in top_level) / 1000
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for entry in sorted(top_level, key=lambda entry: entry['cumulative_us'], reverse=True)[:args.top]:
+        print(f"{entry['cumulative_us'] / 1000:>14.1f} {entry['self_us'] / 1000:>9.1f}  {entry['module']}")
+    print(f"\nTotal import time for '{args.module}': {total_ms:.1f} ms ({len(entries)} modules)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'module': args.module, 'total_ms': total_ms, 'entries': entries}, f, indent=2)
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"Import time budget of {args.budget_ms:.0f} ms exceeded")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
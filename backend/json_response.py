@@ -0,0 +1,28 @@
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+
+
+def _default(value: Any) -> Any:
+    """Serialize types orjson does not handle natively (MongoDB ObjectIds)"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize API content with orjson; datetimes become ISO 8601 strings"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson response that also accepts raw MongoDB documents.
+
+    Endpoints returning this class directly skip FastAPI's ``jsonable_encoder``
+    pass and response-model re-validation.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
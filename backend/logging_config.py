@@ -0,0 +1,130 @@
+import os
+import sys
+import copy
+import queue
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# Correlation fields attached to every log record emitted while handling a request
+request_id_var: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+order_id_var: ContextVar[Optional[str]] = ContextVar('order_id', default=None)
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [request_id=%(request_id)s order_id=%(order_id)s] %(message)s'
+JSON_FORMAT = '%(asctime)s %(name)s %(levelname)s %(message)s %(request_id)s %(order_id)s'
+
+
+class CorrelationFilter(logging.Filter):
+    """Copy the request/order correlation ids from the current context onto the record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.order_id = order_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in N WARNING+ records per configured logger.
+
+    Configured with ``LOG_SAMPLING``, e.g. ``google_sheets_service=10,telegram_service=5``.
+    The next record that is kept carries ``sampled_out``, the number dropped before it.
+    """
+
+    def __init__(self, rates: Dict[str, int]):
+        super().__init__()
+        self.rates = rates
+        self.counters: Dict[str, int] = {}
+
+    @classmethod
+    def parse(cls, setting: str) -> 'SamplingFilter':
+        rates = {}
+        for item in filter(None, (part.strip() for part in setting.split(','))):
+            name, _, every = item.partition('=')
+            if every.strip().isdigit() and int(every) > 1:
+                rates[name.strip()] = int(every)
+        return cls(rates)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        every = self.rates.get(record.name)
+        if every is None or record.levelno < logging.WARNING:
+            return True
+        seen = self.counters.get(record.name, 0)
+        self.counters[record.name] = seen + 1
+        if seen % every:
+            return False
+        record.sampled_out = every - 1 if seen else 0
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the listener thread.
+
+    The stock ``prepare`` fully formats each record (timestamps, tracebacks,
+    JSON) on the calling thread, i.e. the event loop. Here only the message
+    arguments are merged so the record is immutable once queued.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class RestartableQueueListener(logging.handlers.QueueListener):
+    """Queue listener whose ``start``/``stop`` can be called repeatedly.
+
+    The app's lifespan starts and stops it, and a second lifespan in the same
+    process (``--reload``, several TestClient blocks) starts it again, so
+    records queued after a shutdown are still written.
+    """
+
+    running = False
+
+    def start(self):
+        if not self.running:
+            super().start()
+            self.running = True
+
+    def stop(self):
+        if self.running:
+            super().stop()
+            self.running = False
+
+
+def _build_formatter(log_format: str) -> logging.Formatter:
+    if log_format == 'json':
+        try:
+            from pythonjsonlogger import jsonlogger
+            return jsonlogger.JsonFormatter(JSON_FORMAT)
+        except ImportError:
+            logging.getLogger(__name__).warning("python-json-logger is not installed, using text logs")
+    return logging.Formatter(TEXT_FORMAT)
+
+
+def setup_logging() -> RestartableQueueListener:
+    """Route all logging through a queue drained by a background thread.
+
+    ``LOG_FORMAT`` selects ``text`` (default) or ``json``, ``LOG_LEVEL`` the
+    root level and ``LOG_SAMPLING`` per-logger sampling of failure records.
+    Returns the started listener; ``stop()`` flushes it on shutdown and
+    ``start()`` resumes draining when the app starts again.
+    """
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(_build_formatter(os.environ.get('LOG_FORMAT', 'text').lower()))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter.parse(os.environ.get('LOG_SAMPLING', '')))
+    queue_handler.addFilter(CorrelationFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+
+    listener = RestartableQueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
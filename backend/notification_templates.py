@@ -0,0 +1,161 @@
+import os
+import logging
+from string import Formatter
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Telegram rejects messages longer than this (in characters after entity parsing)
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+MARKDOWN_V2 = 'MarkdownV2'
+HTML = 'HTML'
+
+# Single-pass escaping tables, built once
+_ESCAPE_TABLES = {
+    MARKDOWN_V2: str.maketrans({char: '\\' + char for char in '\\_*[]()~`>#+-=|{}.!'}),
+    HTML: str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}),
+}
+
+# File extension -> parse mode for owner-editable templates
+_EXTENSIONS = {'.md': MARKDOWN_V2, '.html': HTML}
+
+ELLIPSIS = '…'
+
+BUILTIN_TEMPLATES = {
+    'order_full': """🛒 *NEW ORDER RECEIVED\\!*
+
+📋 *Order Details:*
+• *Customer:* {customer_name}
+• *Phone:* {customer_phone}
+• *Email:* {customer_email}
+• *Address:* {customer_address}
+
+🛍️ *Product Information:*
+• *Product:* {product_name}
+• *Category:* {product_category}
+• *Price:* {product_price}
+• *Color:* {selected_color}
+• *Size:* {selected_size}
+• *Quantity:* {quantity}
+
+📝 *Notes:* {notes}
+
+⏰ *Timestamp:* {timestamp}
+
+Please contact the customer to confirm the order\\.""",
+
+    'order_compact': "🛒 *{product_name}* × {quantity} — {customer_name}, {customer_phone}",
+
+    'error': """⚠️ *ORDER PROCESSING ERROR\\!*
+
+*Error Details:*
+• *Customer:* {customer_name}
+• *Error:* {error}
+• *Timestamp:* {timestamp}
+
+Please check the system and contact the customer if needed\\.""",
+
+    'bulk_summary': """📦 *BULK ORDER IMPORT\\!*
+
+• *Imported orders:* {imported}
+• *Total units:* {units}
+• *Rejected lines:* {failed}
+• *Import ID:* {import_id}
+• *Timestamp:* {timestamp}
+
+Check the order sheet for the new rows\\.""",
+}
+
+
+def escape(text: str, parse_mode: str = MARKDOWN_V2) -> str:
+    """Escape a value for the given parse mode in a single pass"""
+    return text.translate(_ESCAPE_TABLES[parse_mode])
+
+
+class CompiledTemplate:
+    """A template parsed once into literal/field parts.
+
+    Literal text is the owner's markup and is sent as written; every
+    ``{field}`` value is escaped for the template's parse mode.
+    """
+
+    def __init__(self, name: str, source: str, parse_mode: str = MARKDOWN_V2):
+        if parse_mode not in _ESCAPE_TABLES:
+            raise ValueError(f"Unsupported parse mode: {parse_mode}")
+        self.name = name
+        self.parse_mode = parse_mode
+        self._table = _ESCAPE_TABLES[parse_mode]
+        self.parts: List[Tuple[str, Optional[str]]] = [
+            (literal, field_name or None) for literal, field_name, _, _ in Formatter().parse(source)
+        ]
+        self.fields = [field for _, field in self.parts if field]
+        self._literal_length = sum(len(literal) for literal, _ in self.parts)
+
+    def _join(self, escaped: Dict[str, str]) -> str:
+        return ''.join(literal + escaped[field] if field else literal for literal, field in self.parts)
+
+    def render(self, values: Dict[str, Any], limit: int = TELEGRAM_MESSAGE_LIMIT) -> str:
+        """Fill the template, shortening the longest values if the message would exceed ``limit``"""
+        raw = {field: str(values.get(field, 'N/A')) for field in self.fields}
+        escaped = {field: value.translate(self._table) for field, value in raw.items()}
+
+        overflow = self._literal_length + sum(len(escaped[field]) for field in self.fields) - limit
+        while overflow > 0 and raw:
+            # Trim the longest raw value; escaping is redone so no escape sequence is split
+            field = max(raw, key=lambda name: len(escaped[name]))
+            if not raw[field]:
+                break
+            # Escaping can expand a value, so convert the escaped budget back to raw characters
+            expansion = len(escaped[field]) / len(raw[field])
+            keep = max(int((len(escaped[field]) - overflow) / expansion) - len(ELLIPSIS), 0)
+            raw[field] = raw[field][:keep] + ELLIPSIS if keep else ''
+            before = len(escaped[field])
+            escaped[field] = raw[field].translate(self._table)
+            overflow -= before - len(escaped[field])
+
+        return self._join(escaped)
+
+
+class TemplateRegistry:
+    """Compiled notification templates, loaded once at startup.
+
+    Built-in templates can be overridden, and new ones added, by placing
+    ``<name>.md`` (MarkdownV2) or ``<name>.html`` (HTML) files in
+    ``TELEGRAM_TEMPLATE_DIR``.
+    """
+
+    def __init__(self, template_dir: Optional[str] = None):
+        self.templates: Dict[str, CompiledTemplate] = {
+            name: CompiledTemplate(name, source) for name, source in BUILTIN_TEMPLATES.items()
+        }
+        self._inline: Dict[str, CompiledTemplate] = {}
+        if template_dir:
+            self.load_dir(template_dir)
+
+    @classmethod
+    def from_env(cls) -> 'TemplateRegistry':
+        return cls(os.getenv('TELEGRAM_TEMPLATE_DIR'))
+
+    def load_dir(self, template_dir: str):
+        try:
+            for filename in sorted(os.listdir(template_dir)):
+                name, extension = os.path.splitext(filename)
+                if extension not in _EXTENSIONS:
+                    continue
+                with open(os.path.join(template_dir, filename), 'r', encoding='utf-8') as f:
+                    self.templates[name] = CompiledTemplate(name, f.read().rstrip('\n'), _EXTENSIONS[extension])
+                logger.info(f"Loaded notification template '{name}'")
+        except Exception as e:
+            logger.error(f"Failed to load notification templates from {template_dir}: {str(e)}")
+
+    def get(self, name_or_source: str) -> CompiledTemplate:
+        """Look up a template by name, or compile (and cache) an inline MarkdownV2 template"""
+        template = self.templates.get(name_or_source)
+        if template is not None:
+            return template
+        template = self._inline.get(name_or_source)
+        if template is None:
+            template = CompiledTemplate('inline', name_or_source)
+            self._inline[name_or_source] = template
+        return template
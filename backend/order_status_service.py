@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATUS = 'New Order'
+
+# Fields returned to customers; never includes contact details
+STATUS_PROJECTION = {'_id': 0, 'order_id': 1, 'status': 1, 'created_at': 1, 'status_updated_at': 1}
+
+
+class TTLCache:
+    """In-process LRU cache whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class OrderStatusService:
+    """Customer-facing order status lookups.
+
+    Reads go local LRU -> Redis (when ``REDIS_URL`` is set) -> MongoDB by the
+    indexed ``order_id``. Statuses are edited by the owner in the sheet, so a
+    background task periodically reads the Status cell of recent orders with
+    one ``batchGet`` per chunk, writes changes back to MongoDB and drops the
+    affected cache entries.
+    """
+
+    def __init__(self):
+        self.cache = TTLCache(ttl=float(os.getenv('ORDER_STATUS_CACHE_SECONDS', '60')))
+        self.redis_url = os.getenv('REDIS_URL')
+        self.redis = None
+        self.sync_interval = float(os.getenv('ORDER_STATUS_SYNC_SECONDS', '300'))
+        self.sync_days = int(os.getenv('ORDER_STATUS_SYNC_DAYS', '14'))
+        self.sync_batch_size = 200
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def _redis_client(self):
+        if self.redis is None and self.redis_url:
+            try:
+                import redis.asyncio as redis
+                self.redis = redis.from_url(self.redis_url)
+            except ImportError:
+                logger.warning("REDIS_URL is set but the redis package is not installed")
+                self.redis_url = None
+        return self.redis
+
+    async def ensure_indexes(self, db):
+        await db.orders.create_index('order_id', unique=True)
+        await db.orders.create_index([('created_at', -1)])
+
+    async def get_status(self, db, order_id: str) -> Optional[Dict[str, Any]]:
+        """Return status and timestamps for an order, or None if it does not exist"""
+        status = self.cache.get(order_id)
+        if status is not None:
+            return status
+
+        redis = self._redis_client()
+        if redis is not None:
+            try:
+                cached = await redis.get(f"order_status:{order_id}")
+                if cached:
+                    status = json.loads(cached)
+                    self.cache.set(order_id, status)
+                    return status
+            except Exception as e:
+                logger.warning("Redis order status lookup failed: %s", e)
+
+        doc = await db.orders.find_one({'order_id': order_id}, STATUS_PROJECTION)
+        if doc is None:
+            return None
+
+        status = {
+            'order_id': doc['order_id'],
+            'status': doc.get('status', DEFAULT_STATUS),
+            'created_at': doc['created_at'].isoformat() if doc.get('created_at') else None,
+            'status_updated_at': doc['status_updated_at'].isoformat() if doc.get('status_updated_at') else None,
+        }
+        self.cache.set(order_id, status)
+        if redis is not None:
+            try:
+                await redis.set(f"order_status:{order_id}", json.dumps(status), ex=int(self.cache.ttl))
+            except Exception as e:
+                logger.warning("Redis order status write failed: %s", e)
+        return status
+
+    async def invalidate(self, order_id: str):
+        self.cache.delete(order_id)
+        redis = self._redis_client()
+        if redis is not None:
+            try:
+                await redis.delete(f"order_status:{order_id}")
+            except Exception as e:
+                logger.warning("Redis order status invalidation failed: %s", e)
+
+    async def sync_from_sheet(self, db, sheets_service) -> Dict[str, Any]:
+        """Pull the Status cell for recent orders from the sheet and store changes"""
+        since = datetime.utcnow() - timedelta(days=self.sync_days)
+        cursor = db.orders.find(
+            {'created_at': {'$gte': since}, 'sheet_row': {'$ne': None}},
+            {'_id': 0, 'order_id': 1, 'sheet_tab': 1, 'sheet_row': 1, 'status': 1}
+        ).sort('created_at', -1)
+
+        checked = 0
+        changed = 0
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= self.sync_batch_size:
+                changed += await self._sync_batch(db, sheets_service, batch)
+                checked += len(batch)
+                batch = []
+        if batch:
+            changed += await self._sync_batch(db, sheets_service, batch)
+            checked += len(batch)
+
+        if changed:
+            logger.info("Order status sync: %s of %s recent orders changed", changed, checked)
+        return {'checked': checked, 'changed': changed}
+
+    async def _sync_batch(self, db, sheets_service, docs) -> int:
+        locations = [(doc.get('sheet_tab') or sheets_service.sheet_name, doc['sheet_row']) for doc in docs]
+        result = await sheets_service.get_field_values('status', locations)
+        if not result.get('success', False):
+            return 0
+
+        now = datetime.utcnow()
+        updates = []
+        changed_ids = []
+        for doc, value in zip(docs, result['values']):
+            value = str(value).strip()
+            if value and value != doc.get('status', DEFAULT_STATUS):
+                updates.append(UpdateOne(
+                    {'order_id': doc['order_id']},
+                    {'$set': {'status': value, 'status_updated_at': now}}
+                ))
+                changed_ids.append(doc['order_id'])
+        if updates:
+            await db.orders.bulk_write(updates, ordered=False)
+            for order_id in changed_ids:
+                await self.invalidate(order_id)
+        return len(updates)
+
+    async def _sync_loop(self, db, sheets_service):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync_from_sheet(db, sheets_service)
+            except Exception as e:
+                logger.error("Order status sync failed: %s", e)
+
+    def start_sync(self, db, sheets_service):
+        """Start the periodic sheet sync (no-op when the interval is 0)"""
+        if self.sync_interval > 0 and self._sync_task is None:
+            self._sync_task = asyncio.create_task(self._sync_loop(db, sheets_service))
+
+    async def stop_sync(self):
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            self._sync_task = None
+        if self.redis is not None:
+            await self.redis.close()
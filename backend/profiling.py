@@ -0,0 +1,166 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_CPU_PROFILE_SECONDS = 60
+MAX_STACK_DEPTH = 64
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def deep_sizeof(obj: Any, max_items: int = 100000) -> int:
+    """Approximate bytes held by a container and its contents (visits at most ``max_items`` objects)"""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack and len(seen) < max_items:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return total
+
+
+class CPUSampler:
+    """Wall-clock sampling profiler built on ``sys._current_frames``.
+
+    A daemon thread records every other thread's stack each ``interval``
+    seconds and counts identical stacks, producing the "folded" format read
+    by flamegraph.pl and speedscope. Nothing is installed between profiles,
+    so the running app pays no cost unless a profile is in progress.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def sample(self, seconds: float, interval: float) -> Dict[str, Any]:
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A CPU profile is already running")
+        try:
+            own_id = threading.get_ident()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks: Counter = Counter()
+            samples = 0
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    labels = []
+                    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                    stacks[';'.join(reversed(labels))] += 1
+                samples += 1
+                time.sleep(interval)
+            return {'samples': samples, 'stacks': stacks}
+        finally:
+            self._lock.release()
+
+
+class Profiler:
+    """On-demand diagnostics for a running worker: CPU samples, heap snapshots
+    and the sizes of registered in-process structures.
+    """
+
+    def __init__(self):
+        self.cpu = CPUSampler()
+        self._structures: Dict[str, Callable[[], Any]] = {}
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def register(self, name: str, provider: Callable[[], Any]):
+        """Report the object returned by ``provider`` in structure dumps"""
+        self._structures[name] = provider
+
+    async def cpu_profile(self, seconds: float, interval: float = 0.005) -> str:
+        """Sample all threads for ``seconds`` and return folded stacks"""
+        seconds = max(0.1, min(seconds, MAX_CPU_PROFILE_SECONDS))
+        interval = max(0.001, interval)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, self.cpu.sample, seconds, interval)
+        logger.info("CPU profile finished: %s samples over %.1fs", result['samples'], seconds)
+        lines = [f"{stack} {count}" for stack, count in result['stacks'].most_common()]
+        return '\n'.join(lines) + '\n'
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start_tracing(self, frames: int = 10):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self._last_snapshot = None
+            logger.info("tracemalloc started (%s frames)", frames)
+
+    def stop_tracing(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self._last_snapshot = None
+            logger.info("tracemalloc stopped")
+
+    def memory_snapshot(self, limit: int = 50) -> str:
+        """Top allocation sites, plus the growth since the previous snapshot"""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [
+            f"# tracemalloc snapshot {datetime.utcnow().isoformat()}Z",
+            f"# traced: {current} bytes, peak: {peak} bytes",
+            "",
+            f"## Top {limit} allocation sites",
+        ]
+        lines.extend(str(stat) for stat in snapshot.statistics('lineno')[:limit])
+
+        if self._last_snapshot is not None:
+            lines.extend(["", f"## Top {limit} changes since previous snapshot"])
+            lines.extend(str(stat) for stat in snapshot.compare_to(self._last_snapshot, 'lineno')[:limit])
+        self._last_snapshot = snapshot
+        return '\n'.join(lines) + '\n'
+
+    def structure_sizes(self) -> List[Dict[str, Any]]:
+        """Entry counts and approximate sizes of registered structures, largest first"""
+        report = []
+        for name, provider in self._structures.items():
+            try:
+                obj = provider()
+                entry = {'name': name, 'type': type(obj).__name__, 'bytes': deep_sizeof(obj)}
+                try:
+                    entry['entries'] = len(obj)
+                except TypeError:
+                    if hasattr(obj, 'qsize'):
+                        entry['entries'] = obj.qsize()
+                report.append(entry)
+            except Exception as e:
+                report.append({'name': name, 'error': str(e)})
+        report.sort(key=lambda entry: entry.get('bytes', 0), reverse=True)
+        return report
+
+# Initialize the profiler
+profiler = Profiler()
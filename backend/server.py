@@ -1,41 +1,117 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel, Field, validator
+from pymongo.errors import BulkWriteError, OperationFailure
+from bson import ObjectId
+from pydantic import BaseModel, Field, field_validator, ValidationError
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import os
 import logging
 import uuid
 import asyncio
+import secrets
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Import our services
-import sys
-sys.path.append('/app/backend')
-from google_sheets_service import sheets_service
-from telegram_service import telegram_service
-
-# Load environment variables
+# Load environment variables before any module reads its settings
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Import our services
+from google_sheets_service import GoogleSheetsService
+from telegram_service import TelegramService
+from analytics_service import analytics_service
+from dead_letter_service import dead_letter_service, KIND_SHEETS, KIND_TELEGRAM, KIND_MONGO
+from bulk_import import detect_format, iter_ndjson_records, iter_csv_records
+from json_response import FastJSONResponse, dumps
+from logging_config import setup_logging, request_id_var, order_id_var
+from early_reject import EarlyRejectMiddleware, OffenderCache
+from order_status_service import OrderStatusService, DEFAULT_STATUS
+from profiling import profiler
+from deadlines import start_deadline, within_deadline, DeadlineExceeded, deadline_exceeded_counts
+
+# Configure logging (queued, written by a background thread)
+log_listener = setup_logging()
 logger = logging.getLogger(__name__)
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'shopeasy_db')]
+# MongoDB connection and external services, created by the lifespan handler
+client: Optional[AsyncIOMotorClient] = None
+db = None
+sheets_service: Optional[GoogleSheetsService] = None
+telegram_service: Optional[TelegramService] = None
+order_status_service: Optional[OrderStatusService] = None
+
+# Pre-open Mongo, Google and Telegram connections before serving the first request
+STARTUP_WARMUP = os.environ.get('STARTUP_WARMUP', 'false').lower() == 'true'
+STARTUP_WARMUP_TIMEOUT = float(os.environ.get('STARTUP_WARMUP_TIMEOUT', '10'))
+warmup_results: Dict[str, Any] = {}
+
+async def warm_up_connections():
+    """Open each backend connection concurrently; failures are logged, never fatal"""
+    async def ping_mongo():
+        await db.command('ping')
+        return {'success': True}
+    
+    checks = {
+        'mongodb': ping_mongo(),
+        'google_sheets': sheets_service.warm_up(),
+        'telegram': telegram_service.test_connection()
+    }
+    started = asyncio.get_running_loop().time()
+    results = await asyncio.gather(
+        *(asyncio.wait_for(check, STARTUP_WARMUP_TIMEOUT) for check in checks.values()),
+        return_exceptions=True
+    )
+    for name, result in zip(checks, results):
+        if isinstance(result, BaseException):
+            result = {'success': False, 'error': str(result) or type(result).__name__}
+        warmup_results[name] = result.get('success', False)
+        if not warmup_results[name]:
+            logger.warning(f"Warm-up of {name} failed: {result.get('error', 'Unknown error')}")
+    logger.info(f"Warm-up finished in {asyncio.get_running_loop().time() - started:.2f}s: {warmup_results}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db, sheets_service, telegram_service, order_status_service
+    log_listener.start()
+    logger.info("ShopEasy API starting up...")
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017/'))
+    db = client[os.environ.get('DB_NAME', 'shopeasy_db')]
+    sheets_service = GoogleSheetsService()
+    telegram_service = TelegramService()
+    order_status_service = OrderStatusService()
+    await sheets_service.initialize()
+    await telegram_service.start()
+    logger.info(f"Google Sheets configured: {sheets_service.service is not None}")
+    logger.info(f"Telegram configured: {telegram_service.bot_token != 'YOUR_BOT_TOKEN_PLACEHOLDER'}")
+    try:
+        await analytics_service.ensure_indexes(db)
+        await dead_letter_service.ensure_indexes(db)
+        await order_status_service.ensure_indexes(db)
+        await ensure_status_check_indexes()
+    except Exception as e:
+        logger.warning(f"Failed to create indexes: {str(e)}")
+    if STARTUP_WARMUP:
+        await warm_up_connections()
+    order_status_service.start_sync(db, sheets_service)
+    
+    yield
+    
+    await order_status_service.stop_sync()
+    await telegram_service.close()
+    client.close()
+    logger.info("ShopEasy API shutting down...")
+    log_listener.stop()
 
 # Create the main app
-app = FastAPI(title="ShopEasy API", description="E-commerce API with Google Sheets and Telegram integration")
+app = FastAPI(
+    title="ShopEasy API",
+    description="E-commerce API with Google Sheets and Telegram integration",
+    lifespan=lifespan
+)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -43,6 +119,30 @@ api_router = APIRouter(prefix="/api")
 # Rate limiting storage (simple in-memory for MVP)
 rate_limit_storage = {}
 
+# Early rejection state, shared with EarlyRejectMiddleware and reported by /health
+offender_cache = OffenderCache()
+early_reject_counters: Dict[str, int] = {}
+
+# Admin endpoints are disabled unless a token is configured
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+
+# Bulk import: orders per Mongo insert_many / Sheets append, and per-line errors returned
+BULK_IMPORT_CHUNK_SIZE = int(os.environ.get('BULK_IMPORT_CHUNK_SIZE', '500'))
+BULK_IMPORT_MAX_ERRORS = 200
+
+# Legacy status checks: retention (seconds) and page size cap for GET /api/status
+STATUS_CHECK_RETENTION_SECONDS = int(os.environ.get('STATUS_CHECK_RETENTION_SECONDS', str(7 * 24 * 3600)))
+STATUS_CHECK_MAX_PAGE = 1000
+STATUS_CHECK_PROJECTION = {'_id': 1, 'id': 1, 'client_name': 1, 'timestamp': 1}
+
+# On-demand profiling endpoints (admin token required as well)
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+
+# Total time budget for one order across Sheets, Telegram and MongoDB calls
+ORDER_DEADLINE_SECONDS = float(os.environ.get('ORDER_DEADLINE_SECONDS', '15'))
+# Time reserved for the MongoDB backup write once the order is in the sheet
+ORDER_BACKUP_MIN_SECONDS = float(os.environ.get('ORDER_BACKUP_MIN_SECONDS', '5'))
+
 # Pydantic Models
 class OrderCreate(BaseModel):
     customer_name: str = Field(..., min_length=2, max_length=100)
@@ -60,8 +160,9 @@ class OrderCreate(BaseModel):
     honeypot: str = Field(default="")  # Spam protection
     timestamp: Optional[str] = None
 
-    @validator('honeypot')
-    def honeypot_must_be_empty(cls, v):
+    @field_validator('honeypot')
+    @classmethod
+    def honeypot_must_be_empty(cls, v: str) -> str:
         if v and v.strip():
             raise ValueError('Spam detected')
         return v
@@ -73,6 +174,29 @@ class OrderResponse(BaseModel):
     order_id: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
+ORDER_SUCCESS_MESSAGE = "Order placed successfully! You will receive a confirmation email shortly."
+ORDER_QUEUED_MESSAGE = "Order received! We will confirm it shortly, there is no need to order again."
+
+def order_success_content(order_id: str) -> Dict[str, Any]:
+    """Build the OrderResponse payload directly, without model construction and re-validation"""
+    return {
+        'id': order_id,
+        'status': 'success',
+        'message': ORDER_SUCCESS_MESSAGE,
+        'order_id': order_id,
+        'timestamp': datetime.utcnow()
+    }
+
+def order_queued_content(order_id: str) -> Dict[str, Any]:
+    """Payload for an order kept as a dead letter, to be added to the sheet by replay"""
+    return {
+        'id': order_id,
+        'status': 'queued',
+        'message': ORDER_QUEUED_MESSAGE,
+        'order_id': order_id,
+        'timestamp': datetime.utcnow()
+    }
+
 class StatusCheck(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     client_name: str
@@ -108,6 +232,55 @@ async def check_rate_limit(client_ip: str, limit: int = 5, window: int = 300) ->
     rate_limit_storage[client_ip].append(current_time)
     return True
 
+async def require_admin_token(x_admin_token: Optional[str] = Header(default=None)):
+    """Allow the request only when it carries the configured admin token"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+async def require_profiling():
+    """Profiling endpoints exist only when explicitly enabled"""
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled")
+
+def download_response(content: str, filename: str, media_type: str = 'text/plain') -> PlainTextResponse:
+    """Return diagnostic output as a timestamped file attachment"""
+    name, extension = os.path.splitext(filename)
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+    return PlainTextResponse(
+        content,
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="{name}-{stamp}{extension}"'}
+    )
+
+def build_order_data(order: OrderCreate, order_id: str, timestamp: str) -> Dict[str, Any]:
+    """Flatten a validated order into the dict used by Sheets, Telegram and MongoDB"""
+    return {
+        'order_id': order_id,
+        'timestamp': timestamp,
+        'customer_name': order.customer_name,
+        'customer_email': order.customer_email,
+        'customer_phone': order.customer_phone,
+        'customer_address': order.customer_address,
+        'product_id': order.product_id,
+        'product_name': order.product_name,
+        'product_category': order.product_category,
+        'product_price': order.product_price,
+        'selected_color': order.selected_color,
+        'selected_size': order.selected_size,
+        'quantity': order.quantity,
+        'notes': order.notes
+    }
+
+def is_rate_limited(client_ip: str, limit: int = 5, window: int = 300) -> bool:
+    """Check the order rate limit without recording a request"""
+    current_time = datetime.now().timestamp()
+    timestamps = rate_limit_storage.get(client_ip)
+    if not timestamps:
+        return False
+    return sum(1 for timestamp in timestamps if current_time - timestamp < window) >= limit
+
 # API Routes
 @api_router.get("/")
 async def root():
@@ -121,7 +294,10 @@ async def health_check():
         "services": {
             "google_sheets": "configured" if sheets_service.service else "not_configured",
             "telegram": "configured" if telegram_service.bot_token != 'YOUR_BOT_TOKEN_PLACEHOLDER' else "not_configured"
-        }
+        },
+        "deadline_exceeded": deadline_exceeded_counts,
+        "early_rejections": early_reject_counters,
+        "warmup": warmup_results
     }
 
 @api_router.get("/test-connections", response_model=TestConnectionResponse)
@@ -147,7 +323,7 @@ async def test_connections():
         service_account_email=service_email
     )
 
-@api_router.post("/orders", response_model=OrderResponse)
+@api_router.post("/orders", response_model=OrderResponse, response_class=FastJSONResponse)
 async def create_order(order: OrderCreate, request: Request):
     """Create a new order and send to Google Sheets + Telegram"""
     
@@ -161,39 +337,39 @@ async def create_order(order: OrderCreate, request: Request):
             detail="Too many requests. Please wait before placing another order."
         )
     
+    # Every outbound call below only gets the time left in this budget
+    start_deadline(ORDER_DEADLINE_SECONDS)
+    
     try:
         # Generate order ID
         order_id = str(uuid.uuid4())
+        order_id_var.set(order_id)
         current_timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
         
         # Prepare order data for Google Sheets
-        order_data = {
-            'order_id': order_id,
-            'timestamp': current_timestamp,
-            'customer_name': order.customer_name,
-            'customer_email': order.customer_email,
-            'customer_phone': order.customer_phone,
-            'customer_address': order.customer_address,
-            'product_id': order.product_id,
-            'product_name': order.product_name,
-            'product_category': order.product_category,
-            'product_price': order.product_price,
-            'selected_color': order.selected_color,
-            'selected_size': order.selected_size,
-            'quantity': order.quantity,
-            'notes': order.notes
-        }
+        order_data = build_order_data(order, order_id, current_timestamp)
         
         # Add to Google Sheets
         sheets_result = await sheets_service.add_order_to_sheet(order_data)
         
-        if not sheets_result.get('success', False):
-            # If Google Sheets fails, send error notification
+        if sheets_result.get('outcome_unknown'):
+            # The append may still land, so a replay could add the row twice; keep the
+            # order (flagged below) and ask the owner to check the sheet instead
+            await telegram_service.send_error_notification(
+                f"Order {order_id} may be missing from Google Sheets, please check: {sheets_result.get('error')}",
+                order_data
+            )
+        elif not sheets_result.get('success', False):
+            # Keep the order for replay, then send error notification
+            recorded = await dead_letter_service.record(db, KIND_SHEETS, order_data, sheets_result)
             await telegram_service.send_error_notification(
                 f"Failed to add order to Google Sheets: {sheets_result.get('error', 'Unknown error')}",
                 order_data
             )
             
+            # Once the order is queued for replay, a retry would only add a duplicate
+            if recorded.get('success', False):
+                return FastJSONResponse(order_queued_content(order_id), status_code=202)
             raise HTTPException(
                 status_code=500,
                 detail="Failed to process order. Please try again or contact support."
@@ -203,38 +379,58 @@ async def create_order(order: OrderCreate, request: Request):
         telegram_result = await telegram_service.send_order_notification(order_data)
         
         if not telegram_result.get('success', False):
-            logger.warning(f"Failed to send Telegram notification: {telegram_result.get('error', 'Unknown error')}")
-            # Don't fail the order if Telegram fails, just log it
+            logger.warning("Failed to send Telegram notification: %s", telegram_result.get('error', 'Unknown error'))
+            # Don't fail the order if Telegram fails, keep it for replay
+            await dead_letter_service.record(db, KIND_TELEGRAM, order_data, telegram_result)
         
         # Store order in MongoDB as backup
         order_doc = {
             **order_data,
+            **analytics_service.order_metrics(order_data),
+            'sheet_tab': sheets_result.get('sheet_tab'),
+            'sheet_row': sheets_result.get('sheet_row'),
+            'status': DEFAULT_STATUS,
             'sheets_result': sheets_result,
             'telegram_result': telegram_result,
             'created_at': datetime.utcnow()
         }
+        if sheets_result.get('outcome_unknown'):
+            order_doc['sheet_verification'] = 'pending'
+        
+        # The row is already in the sheet, so the backup write gets reserved time and a
+        # failure is kept for replay instead of asking the customer to order again
+        try:
+            await within_deadline(
+                db.orders.insert_one(order_doc), 'mongo.insert_order', minimum=ORDER_BACKUP_MIN_SECONDS
+            )
+        except Exception as e:
+            logger.error("Failed to store order %s in MongoDB, keeping it for replay: %s", order_id, e)
+            await dead_letter_service.record(db, KIND_MONGO, order_doc, {
+                'error': f"Failed to store order: {str(e)}",
+                'error_class': type(e).__name__
+            })
+            return FastJSONResponse(order_success_content(order_id))
         
-        await db.orders.insert_one(order_doc)
+        # Update sales rollups (failures are logged, never fail the order)
+        try:
+            await within_deadline(analytics_service.record_order(db, order_doc), 'mongo.record_rollups')
+        except DeadlineExceeded:
+            logger.warning("Skipped sales rollup update for order %s: deadline exceeded", order_id)
         
-        logger.info(f"Order {order_id} processed successfully")
+        logger.info("Order %s processed successfully", order_id)
         
-        return OrderResponse(
-            id=order_id,
-            status="success",
-            message="Order placed successfully! You will receive a confirmation email shortly.",
-            order_id=order_id
-        )
+        return FastJSONResponse(order_success_content(order_id))
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to process order: {str(e)}")
+        logger.error("Failed to process order: %s", e)
         
         # Send error notification to owner
         try:
             await telegram_service.send_error_notification(
                 f"Order processing failed: {str(e)}",
-                order.dict() if hasattr(order, 'dict') else {}
+                order.model_dump()
             )
         except:
             pass  # Don't fail if error notification fails
@@ -244,33 +440,262 @@ async def create_order(order: OrderCreate, request: Request):
             detail="Failed to process order. Please try again or contact support."
         )
 
+async def _import_order_chunk(chunk, import_id: str, summary: Dict[str, Any], errors: List[Dict[str, Any]]):
+    """Write one chunk of validated bulk orders with a single Sheets append and insert_many"""
+    orders = [order_data for _, order_data in chunk]
+    sheets_result = await sheets_service.add_orders_to_sheet(orders)
+    
+    # Tabs are appended separately, so part of a chunk can fail while the rest is written
+    failed_ids = {order_data['order_id'] for order_data in sheets_result.get('failed', [])}
+    if failed_ids:
+        summary['failed'] += len(failed_ids)
+        for line_no, order_data in chunk:
+            if order_data['order_id'] in failed_ids and len(errors) < BULK_IMPORT_MAX_ERRORS:
+                errors.append({'line': line_no, 'error': sheets_result.get('error', 'Unknown error')})
+    
+    stored = sheets_result.get('written', []) + sheets_result.get('unverified', [])
+    if not stored:
+        return
+    
+    created_at = datetime.utcnow()
+    unverified_ids = {order_data['order_id'] for order_data in sheets_result.get('unverified', [])}
+    append_result = {key: sheets_result.get(key) for key in ('success', 'updated_ranges', 'updated_rows')}
+    order_docs = []
+    for order_data in stored:
+        order_doc = {
+            **order_data,
+            **analytics_service.order_metrics(order_data),
+            'status': DEFAULT_STATUS,
+            'bulk_import_id': import_id,
+            'sheets_result': append_result,
+            'created_at': created_at
+        }
+        if order_data['order_id'] in unverified_ids:
+            order_doc['sheet_verification'] = 'pending'
+        order_docs.append(order_doc)
+    
+    summary['imported'] += len(order_docs)
+    summary['units'] += sum(order_doc['quantity'] for order_doc in order_docs)
+    if unverified_ids:
+        summary['unverified'] = summary.get('unverified', 0) + len(unverified_ids)
+    
+    # The rows are already in the sheet, so a failed backup is kept for replay
+    # (which skips orders that did get stored) instead of failing the upload
+    try:
+        await db.orders.insert_many(order_docs, ordered=False)
+        unsaved = []
+    except BulkWriteError as e:
+        failed_indexes = {error['index'] for error in e.details.get('writeErrors', [])}
+        unsaved = [order_doc for index, order_doc in enumerate(order_docs) if index in failed_indexes]
+        order_docs = [order_doc for index, order_doc in enumerate(order_docs) if index not in failed_indexes]
+        error = e
+    except Exception as e:
+        # Unknown how many were written; replay skips the ones that were
+        unsaved, order_docs, error = order_docs, [], e
+    if unsaved:
+        logger.error(f"Failed to store {len(unsaved)} bulk orders in MongoDB, keeping them for replay: {str(error)}")
+        for order_doc in unsaved:
+            await dead_letter_service.record(db, KIND_MONGO, order_doc, {
+                'error': f"Failed to store order: {str(error)}",
+                'error_class': type(error).__name__
+            })
+    if not order_docs:
+        return
+    
+    # Update sales rollups (failures are logged, never fail the import)
+    try:
+        await analytics_service.record_orders(db, order_docs)
+    except Exception as e:
+        logger.error(f"Failed to update sales rollups for bulk import {import_id}: {str(e)}")
+
+@api_router.get("/orders/{order_id}", response_class=FastJSONResponse)
+async def get_order_status(order_id: str):
+    """Customer-facing order status; returns no contact details"""
+    try:
+        status = await order_status_service.get_status(db, order_id)
+    except Exception as e:
+        logger.error(f"Failed to get order status: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve order status")
+    if status is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return FastJSONResponse(status)
+
+@api_router.post("/orders/bulk", dependencies=[Depends(require_admin_token)], response_class=FastJSONResponse)
+async def bulk_import_orders(request: Request, format: Optional[str] = None):
+    """Import many orders from a streamed NDJSON or CSV upload"""
+    upload_format = detect_format(request.headers.get('content-type', ''), format)
+    if upload_format is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Upload NDJSON (application/x-ndjson) or CSV (text/csv)"
+        )
+    parse_records = iter_ndjson_records if upload_format == 'ndjson' else iter_csv_records
+    
+    import_id = str(uuid.uuid4())
+    current_timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    summary = {'import_id': import_id, 'received': 0, 'imported': 0, 'failed': 0, 'units': 0}
+    errors: List[Dict[str, Any]] = []
+    chunk = []
+    
+    try:
+        async for line_no, record, error in parse_records(request.stream()):
+            summary['received'] += 1
+            if error is None:
+                try:
+                    order = OrderCreate(**record)
+                except ValidationError as e:
+                    error = "; ".join(
+                        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+                    )
+            if error is not None:
+                summary['failed'] += 1
+                if len(errors) < BULK_IMPORT_MAX_ERRORS:
+                    errors.append({'line': line_no, 'error': error})
+                continue
+            
+            chunk.append((line_no, build_order_data(order, str(uuid.uuid4()), current_timestamp)))
+            if len(chunk) >= BULK_IMPORT_CHUNK_SIZE:
+                await _import_order_chunk(chunk, import_id, summary, errors)
+                chunk = []
+        
+        if chunk:
+            await _import_order_chunk(chunk, import_id, summary, errors)
+    except ValueError as e:
+        # Malformed stream: keep what was already imported and report where it stopped
+        summary['aborted'] = str(e)
+    
+    if summary['imported'] or summary['failed']:
+        telegram_result = await telegram_service.send_bulk_import_summary(summary)
+        if not telegram_result.get('success', False):
+            logger.warning(f"Failed to send bulk import summary: {telegram_result.get('error', 'Unknown error')}")
+    
+    logger.info(f"Bulk import {import_id}: {summary['imported']} imported, {summary['failed']} failed")
+    
+    return {
+        **summary,
+        'status': 'success' if not summary['failed'] and 'aborted' not in summary else 'partial',
+        'errors': errors,
+        'errors_truncated': summary['failed'] > len(errors)
+    }
+
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     """Legacy endpoint for status checks"""
-    status_dict = input.dict()
+    status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    _ = await db.status_checks.insert_one(status_obj.model_dump())
     return status_obj
 
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    """Legacy endpoint for getting status checks"""
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+@api_router.get("/status", response_class=FastJSONResponse)
+async def get_status_checks(limit: int = 100, before: Optional[str] = None):
+    """Legacy endpoint for getting status checks, newest first.
+
+    Pages are keyed on ``_id``; pass the ``X-Next-Cursor`` response header
+    back as ``before`` to fetch the next page.
+    """
+    limit = max(1, min(limit, STATUS_CHECK_MAX_PAGE))
+    query = {}
+    if before:
+        if not ObjectId.is_valid(before):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query['_id'] = {'$lt': ObjectId(before)}
+    
+    status_checks = await db.status_checks.find(query, STATUS_CHECK_PROJECTION).sort('_id', -1).limit(limit).to_list(limit)
+    headers = {}
+    if len(status_checks) == limit:
+        headers['X-Next-Cursor'] = str(status_checks[-1]['_id'])
+    for status_check in status_checks:
+        del status_check['_id']
+    return FastJSONResponse(status_checks, headers=headers)
+
+async def ensure_status_check_indexes():
+    """Expire status checks after STATUS_CHECK_RETENTION_SECONDS via a TTL index"""
+    try:
+        await db.status_checks.create_index('timestamp', name='timestamp_ttl', expireAfterSeconds=STATUS_CHECK_RETENTION_SECONDS)
+    except OperationFailure as e:
+        if e.code not in (85, 86):  # IndexOptionsConflict / IndexKeySpecsConflict
+            raise
+        # Retention changed since the index was built; update it in place
+        await db.command('collMod', 'status_checks', index={
+            'name': 'timestamp_ttl',
+            'expireAfterSeconds': STATUS_CHECK_RETENTION_SECONDS
+        })
 
-@api_router.get("/orders")
+@api_router.get("/orders", response_class=FastJSONResponse)
 async def get_orders(limit: int = 50):
     """Get recent orders from MongoDB"""
     try:
         orders = await db.orders.find().sort("created_at", -1).limit(limit).to_list(limit)
-        # Convert ObjectId to string for JSON serialization
-        for order in orders:
-            order['_id'] = str(order['_id'])
-        return {"orders": orders}
+        # FastJSONResponse serializes ObjectId and datetime values directly
+        return FastJSONResponse({"orders": orders})
     except Exception as e:
         logger.error(f"Failed to get orders: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve orders")
 
+@api_router.get("/analytics", response_class=FastJSONResponse)
+async def get_analytics(days: int = 30, top: int = 10):
+    """Get daily revenue, units by category and top products from sales rollups"""
+    days = max(1, min(days, 366))
+    top = max(1, min(top, 100))
+    try:
+        return await analytics_service.get_summary(db, days=days, top=top)
+    except Exception as e:
+        logger.error(f"Failed to get analytics: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve analytics")
+
+# Profiling (admin only)
+profile_router = APIRouter(
+    prefix="/api/admin/profile",
+    dependencies=[Depends(require_admin_token), Depends(require_profiling)]
+)
+
+@profile_router.post("/cpu")
+async def profile_cpu(seconds: float = 10, interval_ms: float = 5):
+    """Sample every thread for up to 60 seconds; returns folded stacks for flame graphs"""
+    try:
+        folded = await profiler.cpu_profile(seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return download_response(folded, 'cpu-profile.folded')
+
+@profile_router.post("/memory/start")
+async def start_memory_tracing(frames: int = 10):
+    profiler.start_tracing(max(1, min(frames, 50)))
+    return {"tracing": profiler.tracing}
+
+@profile_router.post("/memory/stop")
+async def stop_memory_tracing():
+    profiler.stop_tracing()
+    return {"tracing": profiler.tracing}
+
+@profile_router.get("/memory/snapshot")
+async def memory_snapshot(limit: int = 50):
+    """Top allocation sites, and the growth since the previous snapshot"""
+    try:
+        report = await asyncio.get_running_loop().run_in_executor(
+            None, profiler.memory_snapshot, max(1, min(limit, 500))
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return download_response(report, 'memory-snapshot.txt')
+
+@profile_router.get("/structures")
+async def structure_sizes():
+    """Sizes of in-process caches, queues and rate-limit state, largest first"""
+    report = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'structures': profiler.structure_sizes()
+    }
+    return download_response(dumps(report).decode('utf-8'), 'structures.json', 'application/json')
+
+profiler.register('rate_limit_storage', lambda: rate_limit_storage)
+profiler.register('offender_cache', lambda: offender_cache._entries)
+profiler.register('order_status_cache', lambda: order_status_service.cache._entries)
+profiler.register('log_queue', lambda: log_listener.queue)
+profiler.register('sheets_tabs', lambda: sheets_service.tabs or {})
+profiler.register('telegram_inline_templates', lambda: telegram_service.templates._inline)
+profiler.register('deadline_exceeded_counts', lambda: deadline_exceeded_counts)
+
 # Error Handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -287,8 +712,27 @@ async def general_exception_handler(request: Request, exc: Exception):
         content={"detail": "Internal server error", "status": "error"}
     )
 
+@app.middleware("http")
+async def correlation_id_middleware(request: Request, call_next):
+    """Tag every log record emitted during a request with its request id"""
+    request_id = request.headers.get('x-request-id') or uuid.uuid4().hex
+    request_id_var.set(request_id)
+    response = await call_next(request)
+    response.headers['X-Request-ID'] = request_id
+    return response
+
 # Include the router in the main app
 app.include_router(api_router)
+app.include_router(profile_router)
+
+# Reject abusive order requests before FastAPI reads and validates the body
+app.add_middleware(
+    EarlyRejectMiddleware,
+    protected_paths=('/api/orders',),
+    is_rate_limited=is_rate_limited,
+    offenders=offender_cache,
+    counters=early_reject_counters
+)
 
 # CORS middleware
 app.add_middleware(
@@ -297,17 +741,6 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the pagination cursor and correlation id
+    expose_headers=["X-Next-Cursor", "X-Request-ID"],
 )
-
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    logger.info("ShopEasy API starting up...")
-    logger.info(f"Google Sheets configured: {sheets_service.service is not None}")
-    logger.info(f"Telegram configured: {telegram_service.bot_token != 'YOUR_BOT_TOKEN_PLACEHOLDER'}")
-
-# Shutdown event
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
-    logger.info("ShopEasy API shutting down...")
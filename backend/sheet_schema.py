@@ -0,0 +1,143 @@
+import os
+import re
+import json
+import time
+import logging
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Column header -> order field. Columns without a field write a constant default.
+# ``in_default_header`` columns are the ones written when a sheet is empty.
+DEFAULT_COLUMNS = [
+    {'header': 'Timestamp', 'field': 'timestamp'},
+    {'header': 'Customer Name', 'field': 'customer_name'},
+    {'header': 'Customer Email', 'field': 'customer_email'},
+    {'header': 'Customer Phone', 'field': 'customer_phone'},
+    {'header': 'Customer Address', 'field': 'customer_address'},
+    {'header': 'Product Name', 'field': 'product_name'},
+    {'header': 'Product Category', 'field': 'product_category'},
+    {'header': 'Product Price', 'field': 'product_price'},
+    {'header': 'Selected Color', 'field': 'selected_color'},
+    {'header': 'Selected Size', 'field': 'selected_size'},
+    {'header': 'Quantity', 'field': 'quantity', 'default': 1},
+    {'header': 'Notes', 'field': 'notes'},
+    {'header': 'Status', 'field': 'status', 'default': 'New Order'},
+    # Recognised if the owner adds them to the sheet
+    {'header': 'Order ID', 'field': 'order_id', 'in_default_header': False},
+    {'header': 'Product ID', 'field': 'product_id', 'in_default_header': False},
+]
+
+_SPACES_RE = re.compile(r'\s+')
+
+
+def _normalize(header: str) -> str:
+    return _SPACES_RE.sub(' ', str(header)).strip().lower()
+
+
+def column_letter(index: int) -> str:
+    """Convert a 1-based column index to its A1 letter (1 -> A, 27 -> AA)"""
+    letters = ''
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _cell(value: Any) -> Any:
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else str(value)
+
+
+class CompiledHeader:
+    """A sheet header row compiled into a row builder"""
+
+    def __init__(self, header: List[str], plan, version: int):
+        self.header = header
+        self.plan = plan
+        self.version = version
+        self.checked_at = time.monotonic()
+        self.last_column = column_letter(max(len(header), 1))
+
+    def column_for(self, field: str) -> Optional[str]:
+        """A1 letter of the column mapped to an order field, if the sheet has one"""
+        for index, (column_field, _) in enumerate(self.plan, start=1):
+            if column_field == field:
+                return column_letter(index)
+        return None
+
+    def build_row(self, order_data: Dict[str, Any]) -> List[Any]:
+        return [
+            _cell(order_data.get(field, default)) if field else default
+            for field, default in self.plan
+        ]
+
+
+class SheetColumnSchema:
+    """Declarative mapping between order fields and sheet columns.
+
+    Each tab's own header row decides its column order: it is read once,
+    compiled into a ``(field, default)`` plan and cached per tab title. A
+    periodic check of the header row alone (``GOOGLE_SHEET_HEADER_CHECK_SECONDS``)
+    recompiles a tab's plan with a new ``version`` if the owner reorders,
+    renames or adds columns there.
+    """
+
+    def __init__(self, columns: List[Dict[str, Any]], check_interval: float = 300.0):
+        self.columns = columns
+        self.check_interval = check_interval
+        self._by_header = {_normalize(column['header']): column for column in columns}
+        self.compiled: Dict[str, CompiledHeader] = {}
+        self.version = 0
+
+    @classmethod
+    def from_env(cls) -> 'SheetColumnSchema':
+        columns = DEFAULT_COLUMNS
+        schema_file = os.getenv('GOOGLE_SHEET_SCHEMA_FILE')
+        if schema_file:
+            try:
+                with open(schema_file, 'r') as f:
+                    columns = json.load(f)
+            except Exception as e:
+                logger.error(f"Failed to load sheet schema {schema_file}, using defaults: {str(e)}")
+        interval = float(os.getenv('GOOGLE_SHEET_HEADER_CHECK_SECONDS', '300'))
+        return cls(columns, interval)
+
+    @property
+    def default_header(self) -> List[str]:
+        return [column['header'] for column in self.columns if column.get('in_default_header', True)]
+
+    def needs_check(self, tab: str) -> bool:
+        compiled = self.compiled.get(tab)
+        return compiled is None or time.monotonic() - compiled.checked_at >= self.check_interval
+
+    def _compile(self, header: List[str]) -> CompiledHeader:
+        plan = []
+        for title in header:
+            column = self._by_header.get(_normalize(title))
+            if column is None:
+                logger.warning(f"Sheet column '{title}' is not in the schema and will be left empty")
+                plan.append((None, ''))
+            else:
+                plan.append((column.get('field'), column.get('default', '')))
+
+        missing = {_normalize(title) for title in self.default_header} - {_normalize(title) for title in header}
+        if missing:
+            logger.warning(f"Sheet header is missing schema columns: {sorted(missing)}")
+
+        self.version += 1
+        return CompiledHeader(header, plan, self.version)
+
+    def apply_header(self, tab: str, header: List[str]) -> CompiledHeader:
+        """Compile a header row read from a tab; recompile only when it changed"""
+        header = [str(title) for title in header] or self.default_header
+        compiled = self.compiled.get(tab)
+        if compiled is not None and compiled.header == header:
+            compiled.checked_at = time.monotonic()
+            return compiled
+
+        self.compiled[tab] = self._compile(header)
+        if compiled is not None:
+            logger.info(f"Header of sheet '{tab}' changed, row mapping recompiled (version {self.version})")
+        return self.compiled[tab]
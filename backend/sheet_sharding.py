@@ -0,0 +1,109 @@
+import os
+import re
+import logging
+from typing import Dict, Any, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Characters Google Sheets (and Excel exports) reject in tab titles
+_TAB_UNSAFE_RE = re.compile(r"[\[\]\*\?/\\:]")
+MAX_TAB_TITLE = 100
+
+# Storefront categories that get their own tab in category mode, unless
+# GOOGLE_SHEET_CATEGORIES lists others
+DEFAULT_CATEGORIES = [
+    'Make up kits', 'Sarees', 'T-shirts', 'Jeans', 'Ladies fashion', 'Recipes', 'Bridal make up', 'Electronics',
+]
+# Category-mode tab for every category not in the list
+OTHER_CATEGORY = 'Other'
+
+
+def quote_tab(title: str) -> str:
+    """Quote a tab title for use in A1 notation"""
+    return "'" + title.replace("'", "''") + "'"
+
+
+def a1_range(title: str, cells: str) -> str:
+    """Build an A1 range such as 'Orders 2026-10'!A:M"""
+    return f"{quote_tab(title)}!{cells}"
+
+
+_FIRST_ROW_RE = re.compile(r"![A-Z]+(\d+)")
+
+
+def first_row(updated_range: str) -> Optional[int]:
+    """Row number where an append landed, from an updatedRange like 'Sheet1'!A120:M121"""
+    match = _FIRST_ROW_RE.search(updated_range or '')
+    return int(match.group(1)) if match else None
+
+
+class SheetShardingPolicy:
+    """Decides which sheet tab an order row is appended to.
+
+    Modes (``GOOGLE_SHEET_SHARDING``):
+
+    * ``none``: every order goes to the base tab (default, original behaviour)
+    * ``monthly``: one tab per month, e.g. ``Sheet1 2026-10``
+    * ``category``: one tab per known product category, e.g. ``Sheet1 - Sarees``;
+      ``product_category`` comes from the client, so anything not in
+      ``categories`` shares ``Sheet1 - Other``
+    * ``rows:N``: start a new tab (``Sheet1 #2``, ``Sheet1 #3`` ...) every N rows
+    """
+
+    MODES = ('none', 'monthly', 'category', 'rows')
+
+    def __init__(self, base_name: str, mode: str = 'none', max_rows: int = 0,
+                 categories: Optional[List[str]] = None):
+        if mode not in self.MODES:
+            logger.warning(f"Unknown sheet sharding mode '{mode}', using a single tab")
+            mode = 'none'
+        if mode == 'rows' and max_rows <= 1:
+            logger.warning("Row sharding needs a row limit above 1, using a single tab")
+            mode = 'none'
+        self.base_name = base_name
+        self.mode = mode
+        self.max_rows = max_rows
+        # Lower-cased category -> the configured spelling used in the tab title
+        self.categories = {category.lower(): category for category in (categories or DEFAULT_CATEGORIES)}
+        # Row-count mode state, seeded from the spreadsheet on first use
+        self.current_index = 1
+        self.current_rows = 0
+
+    @classmethod
+    def from_env(cls, base_name: str) -> 'SheetShardingPolicy':
+        setting = os.getenv('GOOGLE_SHEET_SHARDING', 'none').strip().lower()
+        mode, _, limit = setting.partition(':')
+        max_rows = int(limit) if limit.isdigit() else 0
+        categories = [category.strip() for category in os.getenv('GOOGLE_SHEET_CATEGORIES', '').split(',') if category.strip()]
+        return cls(base_name, mode, max_rows, categories)
+
+    def _title(self, suffix: str) -> str:
+        title = _TAB_UNSAFE_RE.sub('-', f"{self.base_name}{suffix}").strip()
+        return title[:MAX_TAB_TITLE]
+
+    def _row_tab(self, index: int) -> str:
+        return self.base_name if index == 1 else self._title(f" #{index}")
+
+    def resume_tab(self, titles: Iterable[str]) -> str:
+        """Continue row sharding from the highest-numbered existing tab; returns that tab"""
+        pattern = re.compile(re.escape(self.base_name) + r" #(\d+)$")
+        indexes = [int(match.group(1)) for match in map(pattern.match, titles) if match]
+        self.current_index = max(indexes, default=1)
+        return self._row_tab(self.current_index)
+
+    def route(self, order_data: Dict[str, Any]) -> str:
+        """Return the tab for an order, reserving a row in row-count mode"""
+        if self.mode == 'monthly':
+            month = str(order_data.get('timestamp', ''))[:7] or 'undated'
+            return self._title(f" {month}")
+        if self.mode == 'category':
+            category = str(order_data.get('product_category') or '').strip().lower()
+            return self._title(f" - {self.categories.get(category, OTHER_CATEGORY)}")
+        if self.mode == 'rows':
+            if self.current_rows >= self.max_rows:
+                self.current_index += 1
+                # The header row is written when the new tab is created
+                self.current_rows = 1
+            self.current_rows += 1
+            return self._row_tab(self.current_index)
+        return self.base_name
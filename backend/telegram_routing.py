@@ -0,0 +1,87 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramRouter:
+    """Maps orders to the chats that should be notified.
+
+    Rules come from the JSON file named by ``TELEGRAM_ROUTING_FILE``::
+
+        {
+          "routes": [
+            {"match": {"product_category": ["Sarees", "Ladies fashion"]}, "chats": ["-1001111"]},
+            {"match": {"product_category": ["Electronics"]}, "chats": ["-1002222", "-1003333"]}
+          ],
+          "templates": {"-1003333": "compact"}
+        }
+
+    A rule matches when every field in ``match`` equals (case-insensitively)
+    one of the listed values. An order goes to the union of all matching
+    rules' chats, or to ``TELEGRAM_CHAT_ID`` when nothing matches. Error and
+    summary messages always go to ``TELEGRAM_CHAT_ID``.
+    """
+
+    def __init__(self, default_chat: str, routes: Optional[List[Dict[str, Any]]] = None,
+                 templates: Optional[Dict[str, str]] = None):
+        self.default_chats = [default_chat]
+        self.templates = templates or {}
+        # Pre-normalise match values once so routing is a set lookup per field
+        self.routes = [
+            (
+                {field: {str(value).strip().lower() for value in (values if isinstance(values, list) else [values])}
+                 for field, values in route.get('match', {}).items()},
+                [str(chat) for chat in route.get('chats', [])]
+            )
+            for route in (routes or [])
+        ]
+
+    @classmethod
+    def from_env(cls, default_chat: str) -> 'TelegramRouter':
+        routing_file = os.getenv('TELEGRAM_ROUTING_FILE')
+        if not routing_file:
+            return cls(default_chat)
+        try:
+            with open(routing_file, 'r') as f:
+                config = json.load(f)
+            return cls(default_chat, config.get('routes', []), config.get('templates', {}))
+        except Exception as e:
+            logger.error(f"Failed to load Telegram routing from {routing_file}: {str(e)}")
+            return cls(default_chat)
+
+    def recipients(self, order_data: Dict[str, Any]) -> List[str]:
+        chats: List[str] = []
+        for match, route_chats in self.routes:
+            if all(str(order_data.get(field, '')).strip().lower() in values for field, values in match.items()):
+                chats.extend(chat for chat in route_chats if chat not in chats)
+        return chats or list(self.default_chats)
+
+    def template_for(self, chat_id: str) -> str:
+        return self.templates.get(chat_id, 'full')
+
+
+class AsyncRateLimiter:
+    """Token bucket shared by every send from the bot (Telegram allows ~30 messages/second)"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
@@ -1,160 +1,240 @@
 import os
 import asyncio
 import logging
-from typing import Dict, Any
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Tuple
 import httpx
 from datetime import datetime
+from telegram_routing import TelegramRouter, AsyncRateLimiter
+from notification_templates import TemplateRegistry, MARKDOWN_V2
+from deadlines import within_deadline, remaining
 
 logger = logging.getLogger(__name__)
 
+# Short template names accepted in Telegram routing config
+ORDER_TEMPLATE_ALIASES = {'full': 'order_full', 'compact': 'order_compact'}
+
 class TelegramService:
     def __init__(self):
         self.bot_token = os.getenv('TELEGRAM_BOT_TOKEN', 'YOUR_BOT_TOKEN_PLACEHOLDER')
         self.chat_id = os.getenv('TELEGRAM_CHAT_ID', 'YOUR_CHAT_ID_PLACEHOLDER')
-        self.api_url = f"https://api.telegram.org/bot{self.bot_token}"
+        self.router = TelegramRouter.from_env(self.chat_id)
+        # Notification templates are parsed and compiled once here
+        self.templates = TemplateRegistry.from_env()
+        # Global send budget for the bot, shared by all chats
+        self.rate_limiter = AsyncRateLimiter(float(os.getenv('TELEGRAM_RATE_PER_SECOND', '25')), burst=5)
+        # Upper bound for a single Bot API call; a request deadline can shorten it
+        self.timeout = float(os.getenv('TELEGRAM_TIMEOUT', '10'))
+        # Owner alerts are usually sent because the request ran out of time, so they
+        # get this long even when its budget is spent
+        self.alert_min_seconds = float(os.getenv('TELEGRAM_ALERT_MIN_SECONDS', '5'))
+        # Pooled HTTP client, opened by start() in the app lifespan
+        self.client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def api_url(self) -> str:
+        """Bot API endpoint, read when used so .env (or a local fake, see fake_services.py) applies"""
+        api_base = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
+        return f"{api_base}/bot{self.bot_token}"
+    
+    async def start(self):
+        """Open a shared, keep-alive HTTP client for the Bot API"""
+        if self.client is None:
+            self.client = httpx.AsyncClient()
+    
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
     
-    def _escape_markdown(self, text: str) -> str:
-        """Escape special characters for MarkdownV2"""
-        special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-        for char in special_chars:
-            text = text.replace(char, f'\\{char}')
-        return text
+    @asynccontextmanager
+    async def _http(self):
+        """The shared client when started, else a short-lived one (CLI, scripts)"""
+        if self.client is not None:
+            yield self.client
+        else:
+            async with httpx.AsyncClient() as client:
+                yield client
+    
+    async def _send_message(self, client: httpx.AsyncClient, chat_id: str, text: str,
+                            parse_mode: str = MARKDOWN_V2, minimum: Optional[float] = None) -> httpx.Response:
+        """Post a message within the bot's global rate budget and the request deadline"""
+        await within_deadline(self.rate_limiter.acquire(), 'telegram.rate_limit', minimum=minimum)
+        timeout = remaining('telegram.send', cap=self.timeout, minimum=minimum)
+        return await within_deadline(client.post(
+            f"{self.api_url}/sendMessage",
+            json={
+                "chat_id": chat_id,
+                "text": text,
+                "parse_mode": parse_mode
+            },
+            timeout=timeout
+        ), 'telegram.send', cap=timeout, minimum=minimum)
     
-    async def send_order_notification(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Send new order notification to Telegram"""
+    async def _deliver_order(self, client: httpx.AsyncClient, chat_id: str, message: str,
+                             parse_mode: str) -> Dict[str, Any]:
+        """Send an order notification to one chat"""
         try:
-            # Format the message
-            message = self._format_order_message(order_data)
+            response = await self._send_message(client, chat_id, message, parse_mode)
+            
+            if response.status_code == 200:
+                logger.info("Order notification sent successfully to Telegram chat %s", chat_id)
+                return {
+                    'success': True,
+                    'message': 'Notification sent successfully'
+                }
+            else:
+                logger.error("Failed to send Telegram message to chat %s. Status: %s", chat_id, response.status_code)
+                return {
+                    'success': False,
+                    'error': f"Telegram API error: {response.status_code}",
+                    'error_class': 'TelegramAPIError',
+                    'status_code': response.status_code
+                }
+                
+        except Exception as e:
+            logger.error("Failed to send Telegram notification to chat %s: %s", chat_id, e)
+            return {
+                'success': False,
+                'error': f"Failed to send notification: {str(e)}",
+                'error_class': type(e).__name__
+            }
+    
+    async def send_order_notification(self, order_data: Dict[str, Any], chat_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Send new order notification to every routed chat concurrently"""
+        recipients = chat_ids or self.router.recipients(order_data)
+        
+        try:
+            # Render each template once, however many chats use it
+            messages = {}
+            for chat_id in recipients:
+                template = self.router.template_for(chat_id)
+                if template not in messages:
+                    messages[template] = self._render_order_message(template, order_data)
+        except Exception as e:
+            logger.error("Failed to format Telegram notification: %s", e)
+            return {
+                'success': False,
+                'error': f"Failed to send notification: {str(e)}",
+                'error_class': type(e).__name__,
+                'failed_chats': recipients
+            }
+        
+        async with self._http() as client:
+            results = await asyncio.gather(*(
+                self._deliver_order(client, chat_id, *messages[self.router.template_for(chat_id)])
+                for chat_id in recipients
+            ))
+        
+        per_chat = dict(zip(recipients, results))
+        failed = [chat_id for chat_id, result in per_chat.items() if not result['success']]
+        if not failed:
+            return {
+                'success': True,
+                'message': 'Notification sent successfully',
+                'recipients': per_chat
+            }
+        return {
+            'success': False,
+            'error': '; '.join(f"{chat_id}: {per_chat[chat_id]['error']}" for chat_id in failed),
+            'error_class': per_chat[failed[0]].get('error_class', 'Exception'),
+            'failed_chats': failed,
+            'recipients': per_chat
+        }
+    
+    def _render_order_message(self, template: str, order_data: Dict[str, Any]) -> Tuple[str, str]:
+        """Render an order with a chat's template ('full', 'compact', a template name or inline source)"""
+        compiled = self.templates.get(ORDER_TEMPLATE_ALIASES.get(template, template))
+        return compiled.render(self._order_values(order_data)), compiled.parse_mode
+    
+    def _order_values(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
+        values = {'quantity': 1, 'notes': 'None', **order_data}
+        values.setdefault('timestamp', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        return values
+    
+    def _format_order_message(self, order_data: Dict[str, Any]) -> str:
+        """Format order data into a readable Telegram message"""
+        return self.templates.get('order_full').render(self._order_values(order_data))
+    
+    async def send_error_notification(self, error_message: str, order_data: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Send error notification to Telegram"""
+        try:
+            # Format error message
+            template = self.templates.get('error')
+            message = template.render({
+                'customer_name': order_data.get('customer_name', 'Unknown') if order_data else 'Unknown',
+                'error': error_message,
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            })
             
             # Send message via Telegram API
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_url}/sendMessage",
-                    json={
-                        "chat_id": self.chat_id,
-                        "text": message,
-                        "parse_mode": "MarkdownV2"
-                    },
-                    timeout=10.0
+            async with self._http() as client:
+                response = await self._send_message(
+                    client, self.chat_id, message, template.parse_mode, minimum=self.alert_min_seconds
                 )
                 
                 if response.status_code == 200:
-                    logger.info("Order notification sent successfully to Telegram")
+                    logger.info("Error notification sent successfully to Telegram")
                     return {
                         'success': True,
-                        'message': 'Notification sent successfully'
+                        'message': 'Error notification sent successfully'
                     }
                 else:
-                    logger.error(f"Failed to send Telegram message. Status: {response.status_code}")
+                    logger.error("Failed to send Telegram error message. Status: %s", response.status_code)
                     return {
                         'success': False,
                         'error': f"Telegram API error: {response.status_code}"
                     }
                     
         except Exception as e:
-            logger.error(f"Failed to send Telegram notification: {str(e)}")
+            logger.error("Failed to send Telegram error notification: %s", e)
             return {
                 'success': False,
-                'error': f"Failed to send notification: {str(e)}"
+                'error': f"Failed to send error notification: {str(e)}"
             }
     
-    def _format_order_message(self, order_data: Dict[str, Any]) -> str:
-        """Format order data into a readable Telegram message"""
-        # Escape special characters for MarkdownV2
-        customer_name = self._escape_markdown(order_data.get('customer_name', 'N/A'))
-        customer_phone = self._escape_markdown(order_data.get('customer_phone', 'N/A'))
-        customer_email = self._escape_markdown(order_data.get('customer_email', 'N/A'))
-        customer_address = self._escape_markdown(order_data.get('customer_address', 'N/A'))
-        product_name = self._escape_markdown(order_data.get('product_name', 'N/A'))
-        product_category = self._escape_markdown(order_data.get('product_category', 'N/A'))
-        product_price = self._escape_markdown(order_data.get('product_price', 'N/A'))
-        selected_color = self._escape_markdown(order_data.get('selected_color', 'N/A'))
-        selected_size = self._escape_markdown(order_data.get('selected_size', 'N/A'))
-        quantity = self._escape_markdown(str(order_data.get('quantity', 1)))
-        notes = self._escape_markdown(order_data.get('notes', 'None'))
-        timestamp = self._escape_markdown(order_data.get('timestamp', datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
-        
-        message = f"""🛒 *NEW ORDER RECEIVED\\!*
-
-📋 *Order Details:*
-• *Customer:* {customer_name}
-• *Phone:* {customer_phone}  
-• *Email:* {customer_email}
-• *Address:* {customer_address}
-
-🛍️ *Product Information:*
-• *Product:* {product_name}
-• *Category:* {product_category}
-• *Price:* {product_price}
-• *Color:* {selected_color}
-• *Size:* {selected_size}
-• *Quantity:* {quantity}
-
-📝 *Notes:* {notes}
-
-⏰ *Timestamp:* {timestamp}
-
-Please contact the customer to confirm the order\\."""
-        
-        return message
-    
-    async def send_error_notification(self, error_message: str, order_data: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Send error notification to Telegram"""
+    async def send_bulk_import_summary(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a single summary notification for a bulk order import"""
         try:
-            # Format error message
-            customer_name = order_data.get('customer_name', 'Unknown') if order_data else 'Unknown'
-            escaped_error = self._escape_markdown(error_message)
-            escaped_customer = self._escape_markdown(customer_name)
-            timestamp = self._escape_markdown(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            template = self.templates.get('bulk_summary')
+            message = template.render({
+                'imported': summary.get('imported', 0),
+                'units': summary.get('units', 0),
+                'failed': summary.get('failed', 0),
+                'import_id': summary.get('import_id', 'N/A'),
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            })
             
-            message = f"""⚠️ *ORDER PROCESSING ERROR\\!*
-
-*Error Details:*
-• *Customer:* {escaped_customer}
-• *Error:* {escaped_error}
-• *Timestamp:* {timestamp}
-
-Please check the system and contact the customer if needed\\."""
-            
-            # Send message via Telegram API
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_url}/sendMessage",
-                    json={
-                        "chat_id": self.chat_id,
-                        "text": message,
-                        "parse_mode": "MarkdownV2"
-                    },
-                    timeout=10.0
-                )
+            async with self._http() as client:
+                response = await self._send_message(client, self.chat_id, message, template.parse_mode)
                 
                 if response.status_code == 200:
-                    logger.info("Error notification sent successfully to Telegram")
+                    logger.info("Bulk import summary sent successfully to Telegram")
                     return {
                         'success': True,
-                        'message': 'Error notification sent successfully'
+                        'message': 'Summary sent successfully'
                     }
                 else:
-                    logger.error(f"Failed to send Telegram error message. Status: {response.status_code}")
+                    logger.error(f"Failed to send Telegram bulk import summary. Status: {response.status_code}")
                     return {
                         'success': False,
                         'error': f"Telegram API error: {response.status_code}"
                     }
                     
         except Exception as e:
-            logger.error(f"Failed to send Telegram error notification: {str(e)}")
+            logger.error(f"Failed to send Telegram bulk import summary: {str(e)}")
             return {
                 'success': False,
-                'error': f"Failed to send error notification: {str(e)}"
+                'error': f"Failed to send summary: {str(e)}"
             }
     
     async def test_connection(self) -> Dict[str, Any]:
         """Test Telegram bot connection"""
         try:
-            async with httpx.AsyncClient() as client:
+            async with self._http() as client:
                 response = await client.get(
                     f"{self.api_url}/getMe",
-                    timeout=10.0
+                    timeout=self.timeout
                 )
                 
                 if response.status_code == 200:
@@ -176,6 +256,3 @@ Please check the system and contact the customer if needed\\."""
                 'success': False,
                 'error': f"Connection test failed: {str(e)}"
             }
-
-# Initialize the service
-telegram_service = TelegramService()
@@ -690,6 +690,9 @@ const ProductDetail = () => {
       if (response.data.status === 'success') {
         alert('🎉 Order placed successfully! You will receive a confirmation email shortly.');
         setIsOrderModalOpen(false);
+      } else if (response.data.status === 'queued') {
+        alert(`✅ ${response.data.message}`);
+        setIsOrderModalOpen(false);
       }
     } catch (error) {
       console.error('Order failed:', error);
@@ -867,6 +870,9 @@ const ShoppingPage = () => {
       if (response.data.status === 'success') {
         alert('🎉 Order placed successfully! You will receive a confirmation email shortly.');
         setIsOrderModalOpen(false);
+      } else if (response.data.status === 'queued') {
+        alert(`✅ ${response.data.message}`);
+        setIsOrderModalOpen(false);
       }
     } catch (error) {
       console.error('Order failed:', error);
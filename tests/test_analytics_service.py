@@ -0,0 +1,32 @@
+import pytest
+
+from analytics_service import parse_price_minor_units
+
+
+@pytest.mark.parametrize('price, expected', [
+    ('₹2,500', 250000),
+    ('₹1,00,000', 10000000),
+    ('$19.99', 1999),
+    ('Rs. 500', 50000),
+    ('1,234,567.5', 123456750),
+    ('2500/-', 250000),
+    (1500, 150000),
+    (19.995, 2000),
+])
+def test_parses_unambiguous_prices(price, expected):
+    assert parse_price_minor_units(price) == expected
+
+
+@pytest.mark.parametrize('price', [
+    '€12,50',
+    '1.234,56',
+    '500-700',
+    '12,3456',
+    '19.999',
+    'Price on request',
+    '',
+    None,
+    True,
+])
+def test_ambiguous_prices_are_unpriced(price):
+    assert parse_price_minor_units(price) is None
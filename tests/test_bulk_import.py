@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from bulk_import import MAX_LINE_BYTES, detect_format, iter_csv_records, iter_lines, iter_ndjson_records
+
+
+async def _stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def collect(parser, chunks):
+    async def run():
+        return [item async for item in parser(_stream(chunks))]
+    return asyncio.run(run())
+
+
+def test_detect_format():
+    assert detect_format('application/x-ndjson; charset=utf-8') == 'ndjson'
+    assert detect_format('text/csv') == 'csv'
+    assert detect_format('text/plain', 'CSV') == 'csv'
+    assert detect_format('text/plain', 'xml') is None
+    assert detect_format('application/json') is None
+
+
+def test_lines_split_across_chunks():
+    lines = collect(iter_lines, [b'first li', b'ne\r\nsec', b'ond\nthird'])
+    assert lines == [(1, 'first line'), (2, 'second'), (3, 'third')]
+
+
+def test_byte_order_mark_is_stripped():
+    lines = collect(iter_lines, [b'\xef\xbb\xbfname,quantity\n', b'Saree,2\n'])
+    assert lines == [(1, 'name,quantity'), (2, 'Saree,2')]
+
+
+def test_over_long_complete_line_is_rejected():
+    with pytest.raises(ValueError, match='Line 2'):
+        collect(iter_lines, [b'ok\n' + b'x' * (MAX_LINE_BYTES + 1) + b'\nnext\n'])
+
+
+def test_over_long_unterminated_line_is_rejected():
+    with pytest.raises(ValueError, match='Line 1'):
+        collect(iter_lines, [b'x' * MAX_LINE_BYTES, b'x'])
+
+
+def test_ndjson_records_and_errors():
+    records = collect(iter_ndjson_records, [b'{"product_name": "Saree"}\n\n[1, 2]\n{bad\n'])
+    assert records[0] == (1, {'product_name': 'Saree'}, None)
+    assert records[1] == (3, None, 'Each line must be a JSON object')
+    assert records[2][0] == 4 and records[2][1] is None and records[2][2].startswith('Invalid JSON')
+
+
+def test_csv_quoted_field_spanning_lines():
+    body = b'\xef\xbb\xbfcustomer_name,customer_address,quantity\r\n' \
+           b'Asha,"12 MG Road,\r\nBengaluru",2\r\n' \
+           b'Ravi,"Flat ""B""",\r\n'
+    records = collect(iter_csv_records, [body[:30], body[30:50], body[50:]])
+    assert records == [
+        (2, {'customer_name': 'Asha', 'customer_address': '12 MG Road,\nBengaluru', 'quantity': '2'}, None),
+        (4, {'customer_name': 'Ravi', 'customer_address': 'Flat "B"'}, None),
+    ]
+
+
+def test_csv_extra_columns_and_unterminated_quote():
+    records = collect(iter_csv_records, [b'a,b\n1,2,3\n4,"open\n'])
+    assert records == [
+        (2, None, 'Expected 2 columns, got 3'),
+        (3, None, 'Unterminated quoted field'),
+    ]
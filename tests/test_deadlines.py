@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from deadlines import (
+    DeadlineExceeded, deadline_exceeded_counts, deadline_var, remaining, start_deadline, within_deadline,
+)
+
+
+def test_no_deadline_returns_cap():
+    assert remaining('op') is None
+    assert remaining('op', cap=5) == 5
+
+
+def test_remaining_is_capped():
+    async def run():
+        start_deadline(10)
+        return remaining('op', cap=2), remaining('op')
+    capped, left = asyncio.run(run())
+    assert capped == 2
+    assert 9 < left <= 10
+
+
+def test_spent_budget_raises_and_counts():
+    async def run():
+        start_deadline(-1)
+        coro = asyncio.sleep(0)
+        with pytest.raises(DeadlineExceeded):
+            await within_deadline(coro, 'test.spent')
+        # The awaitable is closed rather than left un-awaited
+        assert coro.cr_frame is None
+    before = deadline_exceeded_counts.get('test.spent', 0)
+    asyncio.run(run())
+    assert deadline_exceeded_counts['test.spent'] == before + 1
+
+
+def test_slow_call_is_cancelled_at_deadline():
+    async def run():
+        start_deadline(0.05)
+        with pytest.raises(DeadlineExceeded) as excinfo:
+            await within_deadline(asyncio.sleep(1), 'test.slow')
+        assert excinfo.value.operation == 'test.slow'
+    asyncio.run(run())
+
+
+def test_minimum_reserves_time_after_budget_is_spent():
+    async def run():
+        start_deadline(-1)
+        assert remaining('op', minimum=3) == 3
+        return await within_deadline(asyncio.sleep(0.01, result='saved'), 'test.minimum', minimum=1)
+    assert asyncio.run(run()) == 'saved'
+
+
+def test_minimum_timeout_is_not_a_deadline_error():
+    async def run():
+        start_deadline(-1)
+        with pytest.raises(asyncio.TimeoutError):
+            await within_deadline(asyncio.sleep(1), 'test.minimum', minimum=0.01)
+    asyncio.run(run())
+
+
+def _slow_sheets(monkeypatch, write_min_seconds):
+    pytest.importorskip('googleapiclient')
+    monkeypatch.setenv('GOOGLE_SHEETS_BACKEND', 'memory')
+    monkeypatch.setenv('GOOGLE_SHEETS_FAULTS', 'latency_ms=300')
+    monkeypatch.setenv('GOOGLE_SHEETS_WRITE_MIN_SECONDS', str(write_min_seconds))
+    monkeypatch.setenv('GOOGLE_SHEET_SHARDING', 'none')
+    from google_sheets_service import GoogleSheetsService
+    return GoogleSheetsService()
+
+
+def test_sheets_append_gets_reserved_time(monkeypatch):
+    service = _slow_sheets(monkeypatch, 5)
+
+    async def run():
+        await service.initialize()
+        start_deadline(0.4)
+        # The header read uses most of the budget; the append still finishes
+        return await service.add_order_to_sheet({'order_id': 'o-1'})
+    result = asyncio.run(run())
+    assert result['success'] is True
+    assert result['sheet_row'] is not None
+
+
+def test_sheets_append_past_reserved_time_is_unknown(monkeypatch):
+    service = _slow_sheets(monkeypatch, 0.05)
+
+    async def run():
+        await service.initialize()
+        # The header read spends the budget, leaving the append only its 50ms reserve
+        start_deadline(0.35)
+        result = await service.add_order_to_sheet({'order_id': 'o-1'})
+        # The append was not cancelled and lands after the caller gave up
+        await asyncio.sleep(0.5)
+        deadline_var.set(None)
+        rows = await service._execute(service.service.values().get(spreadsheetId='x', range="'Sheet1'!A:M"), 'read')
+        return result, rows
+    result, rows = asyncio.run(run())
+    assert result['success'] is False
+    assert result['outcome_unknown'] is True
+    assert len(rows['values']) == 1
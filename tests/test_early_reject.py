@@ -0,0 +1,61 @@
+import asyncio
+
+from early_reject import EarlyRejectMiddleware, OffenderCache
+
+ORDER_HEADERS = [(b'content-length', b'2'), (b'content-type', b'application/json')]
+
+
+def make_middleware(app_status=200, **kwargs):
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': app_status, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b'{}'})
+    return EarlyRejectMiddleware(app, offenders=OffenderCache(), proxy_ips=['127.0.0.1'], **kwargs)
+
+
+def post(middleware, client_ip, user_agent=b'Mozilla/5.0'):
+    scope = {
+        'type': 'http', 'method': 'POST', 'path': '/api/orders', 'client': (client_ip, 50000),
+        'headers': ORDER_HEADERS + [(b'user-agent', user_agent)],
+    }
+    statuses = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'{}', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    asyncio.run(middleware(scope, receive, send))
+    return statuses[0]
+
+
+def test_bot_user_agent_rejects_only_that_request():
+    middleware = make_middleware()
+    assert post(middleware, '203.0.113.7', b'Python-urllib/3.12') == 403
+    assert post(middleware, '203.0.113.7', b'') == 403
+    assert post(middleware, '203.0.113.7') == 200
+    assert middleware.counters == {'bot_user_agent': 2}
+
+
+def test_rate_limited_clients_are_remembered():
+    middleware = make_middleware(app_status=429)
+    assert post(middleware, '203.0.113.7') == 429
+    assert '203.0.113.7' in middleware.offenders
+    assert post(middleware, '203.0.113.7') == 429
+    assert middleware.counters == {'recent_offender': 1}
+
+
+def test_proxy_address_is_never_remembered():
+    middleware = make_middleware(app_status=429)
+    post(middleware, '127.0.0.1')
+    assert len(middleware.offenders) == 0
+
+    middleware.offenders.add('127.0.0.1')
+    middleware.app = make_middleware().app
+    assert post(middleware, '127.0.0.1') == 200
+
+
+def test_header_checks():
+    middleware = make_middleware(max_body_bytes=1)
+    assert post(middleware, '203.0.113.7') == 413
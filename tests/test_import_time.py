@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from import_time import measure, parse_importtime
+
+IMPORT_TIME_BUDGET_MS = float(os.getenv('IMPORT_TIME_BUDGET_MS', '1500'))
+
+# Dev container tooling from the root requirements.txt; the API must not load it
+TOOLING_PACKAGES = {'litellm', 'kubernetes', 'boto3', 'botocore', 'langsmith', 'supabase', 'paramiko'}
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:        45 |         45 |     marshal
+import time:       310 |        475 |   encodings
+import time:      1200 |       1675 | server
+some unrelated warning line
+"""
+
+
+def test_parse_importtime_reads_timings_and_depth():
+    entries = parse_importtime(SAMPLE)
+
+    assert [entry['module'] for entry in entries] == ['_io', 'marshal', 'encodings', 'server']
+    assert entries[0] == {'module': '_io', 'self_us': 120, 'cumulative_us': 120, 'depth': 1}
+    assert entries[1]['depth'] == 2
+    assert entries[3] == {'module': 'server', 'self_us': 1200, 'cumulative_us': 1675, 'depth': 0}
+
+
+def test_parse_importtime_ignores_other_output():
+    assert parse_importtime("Traceback (most recent call last):\n  boom\n") == []
+
+
+def test_server_import_within_budget():
+    for package in ('fastapi', 'motor', 'dotenv', 'googleapiclient'):
+        pytest.importorskip(package)
+
+    entries = measure('server')
+    total_ms = sum(entry['cumulative_us'] for entry in entries if entry['depth'] == 0) / 1000
+    loaded = {entry['module'].split('.')[0] for entry in entries}
+
+    assert not loaded & TOOLING_PACKAGES
+    assert total_ms <= IMPORT_TIME_BUDGET_MS, f"server imports in {total_ms:.0f} ms"
@@ -0,0 +1,45 @@
+import logging
+import queue
+
+from logging_config import TEXT_FORMAT, CorrelationFilter, RestartableQueueListener, order_id_var, request_id_var
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(logging.Formatter(TEXT_FORMAT))
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+def _record(message):
+    record = logging.LogRecord('test', logging.INFO, __file__, 1, message, None, None)
+    CorrelationFilter().filter(record)
+    return record
+
+
+def test_text_format_includes_correlation_ids():
+    request_id_var.set('req-1')
+    order_id_var.set('order-1')
+    line = logging.Formatter(TEXT_FORMAT).format(_record('hello'))
+    assert '[request_id=req-1 order_id=order-1] hello' in line
+
+
+def test_listener_drains_records_queued_between_lifespans():
+    log_queue = queue.SimpleQueue()
+    handler = ListHandler()
+    listener = RestartableQueueListener(log_queue, handler)
+
+    listener.start()
+    listener.start()
+    log_queue.put(_record('first'))
+    listener.stop()
+    listener.stop()
+
+    log_queue.put(_record('while stopped'))
+    listener.start()
+    listener.stop()
+
+    assert [line.rsplit('] ', 1)[1] for line in handler.lines] == ['first', 'while stopped']
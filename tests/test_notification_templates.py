@@ -0,0 +1,48 @@
+from notification_templates import (
+    ELLIPSIS, HTML, TELEGRAM_MESSAGE_LIMIT, CompiledTemplate, TemplateRegistry, escape,
+)
+
+
+def test_escape():
+    assert escape('Price: 1,500.00 (incl. GST)!') == 'Price: 1,500\\.00 \\(incl\\. GST\\)\\!'
+    assert escape('<b>&"', HTML) == '&lt;b&gt;&amp;&quot;'
+
+
+def test_render_escapes_values_but_not_markup():
+    template = CompiledTemplate('t', '*{product_name}* × {quantity}\\.')
+    assert template.render({'product_name': 'Silk_Saree', 'quantity': 2}) == '*Silk\\_Saree* × 2\\.'
+
+
+def test_missing_values_render_as_na():
+    assert CompiledTemplate('t', '{notes}').render({}) == 'N/A'
+
+
+def test_long_values_are_truncated_to_limit():
+    template = CompiledTemplate('t', 'Notes: {notes} / {customer_name}')
+    message = template.render({'notes': 'a.' * 5000, 'customer_name': 'Asha'})
+
+    assert len(message) <= TELEGRAM_MESSAGE_LIMIT
+    assert message.endswith(f'{ELLIPSIS} / Asha')
+    # No escape sequence is cut in half
+    assert '\\' + ELLIPSIS not in message
+
+
+def test_short_messages_are_untouched():
+    template = CompiledTemplate('t', '{notes}')
+    assert template.render({'notes': 'x' * 10}, limit=10) == 'x' * 10
+    assert template.render({'notes': 'x' * 11}, limit=10).endswith(ELLIPSIS)
+
+
+def test_registry_overrides_and_inline_templates(tmp_path):
+    (tmp_path / 'order_compact.html').write_text('<b>{product_name}</b>\n', encoding='utf-8')
+    (tmp_path / 'readme.txt').write_text('ignored', encoding='utf-8')
+    registry = TemplateRegistry(str(tmp_path))
+
+    compact = registry.get('order_compact')
+    assert compact.parse_mode == HTML
+    assert compact.render({'product_name': 'A&B'}) == '<b>A&amp;B</b>'
+    assert 'readme' not in registry.templates
+
+    inline = registry.get('Hello {customer_name}')
+    assert registry.get('Hello {customer_name}') is inline
+    assert inline.fields == ['customer_name']
@@ -0,0 +1,49 @@
+from sheet_schema import DEFAULT_COLUMNS, SheetColumnSchema, column_letter
+
+
+def test_column_letter():
+    assert [column_letter(index) for index in (1, 26, 27, 52, 703)] == ['A', 'Z', 'AA', 'AZ', 'AAA']
+
+
+def test_empty_header_uses_default_columns():
+    schema = SheetColumnSchema(DEFAULT_COLUMNS)
+    compiled = schema.apply_header('Sheet1', [])
+    assert compiled.header == schema.default_header
+    assert 'Order ID' not in compiled.header
+    assert compiled.last_column == 'M'
+
+
+def test_build_row_follows_sheet_order():
+    schema = SheetColumnSchema(DEFAULT_COLUMNS)
+    compiled = schema.apply_header('Sheet1', ['  order   ID', 'Quantity', 'Owner Notes', 'Status', 'Product Price'])
+    row = compiled.build_row({'order_id': 'abc', 'product_price': 1500, 'status': None})
+    assert row == ['abc', '1', '', '', '1500']
+    assert compiled.column_for('status') == 'D'
+    assert compiled.column_for('customer_email') is None
+
+
+def test_headers_are_compiled_per_tab():
+    schema = SheetColumnSchema(DEFAULT_COLUMNS, check_interval=300)
+    first = schema.apply_header('Sheet1', ['Status', 'Order ID'])
+    second = schema.apply_header('Sheet1 #2', ['Order ID', 'Status'])
+
+    assert schema.compiled['Sheet1'] is first
+    assert first.column_for('status') == 'A'
+    assert second.column_for('status') == 'B'
+    assert not schema.needs_check('Sheet1')
+    assert schema.needs_check('Sheet1 #3')
+
+
+def test_unchanged_header_keeps_version():
+    schema = SheetColumnSchema(DEFAULT_COLUMNS)
+    compiled = schema.apply_header('Sheet1', ['Status'])
+    assert schema.apply_header('Sheet1', ['Status']) is compiled
+
+    recompiled = schema.apply_header('Sheet1', ['Status', 'Notes'])
+    assert recompiled.version == compiled.version + 1
+
+
+def test_zero_check_interval_always_rechecks():
+    schema = SheetColumnSchema(DEFAULT_COLUMNS, check_interval=0)
+    schema.apply_header('Sheet1', ['Status'])
+    assert schema.needs_check('Sheet1')
@@ -0,0 +1,63 @@
+from sheet_sharding import SheetShardingPolicy, a1_range, first_row, quote_tab
+
+
+def test_quote_tab_and_a1_range():
+    assert quote_tab("Owner's Orders") == "'Owner''s Orders'"
+    assert a1_range('Orders 2026-10', 'A:M') == "'Orders 2026-10'!A:M"
+
+
+def test_first_row():
+    assert first_row("'Sheet1'!A120:M121") == 120
+    assert first_row("'Sheet1 #2'!A2:M2") == 2
+    assert first_row('') is None
+    assert first_row(None) is None
+
+
+def test_from_env_parses_row_limit(monkeypatch):
+    monkeypatch.setenv('GOOGLE_SHEET_SHARDING', 'Rows:500')
+    policy = SheetShardingPolicy.from_env('Sheet1')
+    assert (policy.mode, policy.max_rows) == ('rows', 500)
+
+
+def test_invalid_modes_fall_back_to_single_tab():
+    assert SheetShardingPolicy('Sheet1', 'weekly').mode == 'none'
+    assert SheetShardingPolicy('Sheet1', 'rows', 1).mode == 'none'
+    assert SheetShardingPolicy('Sheet1').route({'timestamp': '2026-10-19'}) == 'Sheet1'
+
+
+def test_monthly_and_category_routing():
+    monthly = SheetShardingPolicy('Sheet1', 'monthly')
+    assert monthly.route({'timestamp': '2026-10-19T10:00:00'}) == 'Sheet1 2026-10'
+    assert monthly.route({}) == 'Sheet1 undated'
+
+    category = SheetShardingPolicy('Sheet1', 'category')
+    assert category.route({'product_category': ' sarees '}) == 'Sheet1 - Sarees'
+    assert category.route({'product_category': None}) == 'Sheet1 - Other'
+
+
+def test_unknown_categories_share_one_tab():
+    policy = SheetShardingPolicy('Sheet1', 'category', categories=['Silk/Cotton'])
+    assert policy.route({'product_category': 'silk/cotton'}) == 'Sheet1 - Silk-Cotton'
+    # Client-supplied categories must not create a tab each
+    assert {policy.route({'product_category': f'spam {n}'}) for n in range(100)} == {'Sheet1 - Other'}
+
+
+def test_from_env_reads_categories(monkeypatch):
+    monkeypatch.setenv('GOOGLE_SHEET_SHARDING', 'category')
+    monkeypatch.setenv('GOOGLE_SHEET_CATEGORIES', 'Sarees, Kurtas ,')
+    policy = SheetShardingPolicy.from_env('Sheet1')
+    assert policy.route({'product_category': 'Kurtas'}) == 'Sheet1 - Kurtas'
+    assert policy.route({'product_category': 'Jeans'}) == 'Sheet1 - Other'
+
+
+def test_row_routing_rolls_over_and_counts_header():
+    policy = SheetShardingPolicy('Sheet1', 'rows', 3)
+    tabs = [policy.route({}) for _ in range(5)]
+    # Base tab holds 3 rows; each new tab has its header row plus 2 orders
+    assert tabs == ['Sheet1', 'Sheet1', 'Sheet1', 'Sheet1 #2', 'Sheet1 #2']
+
+
+def test_resume_tab_picks_highest_index():
+    policy = SheetShardingPolicy('Sheet1', 'rows', 100)
+    assert policy.resume_tab(['Sheet1', 'Sheet1 #2', 'Sheet1 #10', 'Other #40']) == 'Sheet1 #10'
+    assert policy.resume_tab(['Sheet1']) == 'Sheet1'